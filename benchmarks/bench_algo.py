@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+
+"""
+Throughput of the supported hash algorithms.
+"""
+
+import timeit
+
+import numpy as np
+
+from chash import chash
+
+ALGOS = ['xxh32', 'xxh64', 'xxh64x2']
+
+def bench(x, algo, number=1, repeat=3):
+    return min(timeit.repeat(lambda: chash(x, algo=algo),
+                             number=number, repeat=repeat))/number
+
+if __name__ == '__main__':
+    large = np.random.rand(2**25)
+    small = {'a': [1, 2.0, 'x'], 'b': (None, u'y', {'c': [3, 4]})}
+    print '%-10s %16s %20s' % ('algo', 'large array GB/s',
+                               'small objects/s')
+    for algo in ALGOS:
+        print '%-10s %16.2f %20.0f' % \
+            (algo, large.nbytes/bench(large, algo)/1e9,
+             1/bench(small, algo, number=10000))
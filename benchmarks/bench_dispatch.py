@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+
+"""
+Per-element overhead of chash on nested builtin containers.
+"""
+
+import timeit
+
+from chash import chash
+
+N = 100000
+
+CASES = [
+    ('list of ints', lambda: range(N)),
+    ('list of floats', lambda: [float(i) for i in xrange(N)]),
+    ('list of strs', lambda: [str(i) for i in xrange(N)]),
+    ('list of tuples', lambda: [(i, i) for i in xrange(N/2)]),
+    ('dict of lists', lambda: dict((i, [i]) for i in xrange(N/2))),
+    ('nested lists', lambda: [[[i, i+1]] for i in xrange(N/3)]),
+]
+
+def count_elements(x):
+    if isinstance(x, dict):
+        return sum(1+count_elements(k)+count_elements(v) \
+                   for k, v in x.iteritems())
+    elif isinstance(x, (list, tuple)):
+        return sum(1+count_elements(e) for e in x)
+    else:
+        return 0
+
+def bench(x, repeat=5):
+    return min(timeit.repeat(lambda: chash(x), number=1, repeat=repeat))
+
+if __name__ == '__main__':
+    print '%-16s %10s %12s' % ('case', 'elements', 'ns/element')
+    for name, make in CASES:
+        x = make()
+        n = count_elements(x)
+        t = bench(x)
+        print '%-16s %10d %12.1f' % (name, n, 1e9*t/n)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+"""
+Peak memory and throughput of hashing an array stored in a .npy file.
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from chash import chash, chash_file
+
+NBYTES = 2**28
+
+def peak_rss():
+    # ru_maxrss is in kilobytes on Linux:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024
+
+def run(method, filename):
+    rss = peak_rss()
+    start = time.time()
+    if method == 'load':
+        chash(np.load(filename))
+    elif method == 'mmap':
+        chash(np.load(filename, mmap_mode='r'))
+    elif method == 'chash_file':
+        chash_file(filename)
+    else:
+        raise ValueError('invalid method')
+    t = time.time()-start
+    print '%-12s %14.1f %10.2f' % (method, (peak_rss()-rss)/2.0**20,
+                                   NBYTES/t/1e9)
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(sys.argv[1], sys.argv[2])
+    else:
+        fd, filename = tempfile.mkstemp(suffix='.npy')
+        os.close(fd)
+        try:
+            np.save(filename, np.random.rand(NBYTES/8))
+
+            # Run each case in a fresh process so that peak RSS is comparable:
+            print '%-12s %14s %10s' % ('method', 'peak +RSS (MB)', 'GB/s')
+            for method in ['load', 'mmap', 'chash_file']:
+                sys.stdout.flush()
+                subprocess.check_call([sys.executable, __file__, method,
+                                       filename])
+        finally:
+            os.remove(filename)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+"""
+Time taken to import chash (and hash a few objects) in a fresh interpreter.
+"""
+
+import subprocess
+import sys
+
+N = 10
+
+CASES = [
+    ('numpy', 'import numpy'),
+    ('pandas', 'import pandas'),
+    ('chash', 'import chash'),
+    ('chash+builtins', 'import chash; chash.chash([1, "a", {2: 3.0}])'),
+    ('chash+ndarray', 'import numpy, chash; chash.chash(numpy.arange(10))'),
+    ('chash+DataFrame', 'import pandas, chash; '
+                        'chash.chash(pandas.DataFrame({"a": [1]}))'),
+]
+
+# Print the time taken to execute a statement and whether pandas was loaded:
+TEMPLATE = '''
+import time
+start = time.time()
+%s
+import sys
+print time.time()-start, 'pandas' in sys.modules
+'''
+
+def bench(stmt):
+    times = []
+    for i in xrange(N):
+        out = subprocess.check_output([sys.executable, '-c', TEMPLATE % stmt])
+        t, pandas = out.split()
+        times.append(float(t))
+    return sorted(times)[N//2], pandas == 'True'
+
+if __name__ == '__main__':
+    print '%-16s %12s %8s' % ('case', 'median (ms)', 'pandas')
+    for name, stmt in CASES:
+        t, pandas = bench(stmt)
+        print '%-16s %12.1f %8s' % (name, 1e3*t, pandas)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+"""
+Batch hashing of many small records compared with a loop over chash.
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from chash import chash, chash_many
+
+N = 100000
+
+def bench(f, repeat=3):
+    return min(timeit.repeat(f, number=1, repeat=repeat))
+
+if __name__ == '__main__':
+    records = [{'id': i, 'name': str(i), 'value': i/3.0} for i in xrange(N)]
+    a = np.random.rand(N, 8)
+    df = pd.DataFrame({'a': np.arange(N), 'b': np.random.rand(N)})
+    print '%-16s %12s %12s' % ('case', 'loop (s)', 'batch (s)')
+    print '%-16s %12.4f %12.4f' % \
+        ('dict records', bench(lambda: [chash(r) for r in records]),
+         bench(lambda: chash_many(records)))
+    print '%-16s %12.4f %12.4f' % \
+        ('array rows', bench(lambda: [chash(r) for r in a]),
+         bench(lambda: chash_many(a)))
+    print '%-16s %12.4f %12.4f' % \
+        ('DataFrame rows',
+         bench(lambda: [chash(tuple(r)) for r in df.itertuples(False)]),
+         bench(lambda: chash_many(df)))
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+
+"""
+Scaling of parallel chunked hashing of large arrays.
+"""
+
+import timeit
+
+import numpy as np
+
+from chash import chash
+
+NBYTES = 2**28
+
+def bench(x, repeat=3, **kwargs):
+    return min(timeit.repeat(lambda: chash(x, **kwargs),
+                             number=1, repeat=repeat))
+
+if __name__ == '__main__':
+    x = np.random.rand(NBYTES/8)
+    t = bench(x)
+    print '%-10s %8s' % ('threads', 'GB/s')
+    print '%-10s %8.2f' % ('serial', NBYTES/t/1e9)
+    for workers in [1, 2, 4, 8]:
+        t = bench(x, parallel=True, workers=workers)
+        print '%-10d %8.2f' % (workers, NBYTES/t/1e9)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+"""
+Throughput and duplicate computations of a memoized method shared by threads.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from chash import lfu_cache_method
+
+KEYS = 64
+CALLS = 2000
+
+def make(thread_safe):
+    class Foo(object):
+        def __init__(self):
+            self.computed = []
+
+        @lfu_cache_method(KEYS, 0, thread_safe=thread_safe)
+        def meth(self, x):
+            self.computed.append(x)
+
+            # Simulate a computation that releases the GIL:
+            time.sleep(0.001)
+            return x
+    return Foo()
+
+def run(threads, thread_safe):
+    foo = make(thread_safe)
+    errors = []
+    keys = np.random.RandomState(0).randint(0, KEYS, CALLS)
+    def work(i):
+        for k in keys[i::threads]:
+            try:
+                foo.meth(int(k))
+            except Exception:
+                errors.append(k)
+    workers = [threading.Thread(target=work, args=(i,)) \
+               for i in xrange(threads)]
+    start = time.time()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    t = time.time()-start
+    return CALLS/t, len(foo.computed)-len(set(foo.computed)), len(errors)
+
+if __name__ == '__main__':
+    print '%-8s %-12s %12s %12s %8s' % ('threads', 'thread_safe', 'calls/s',
+                                        'duplicates', 'errors')
+    for threads in [1, 2, 4, 8, 16, 32]:
+        for thread_safe in [False, True]:
+            rate, duplicates, errors = run(threads, thread_safe)
+            print '%-8d %-12s %12.0f %12d %8d' % \
+                (threads, thread_safe, rate, duplicates, errors)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+"""
+Peak memory and throughput of hashing C-order, F-order and strided arrays.
+"""
+
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from chash import chash
+
+SHAPE = (4096, 4096)
+
+def make(order):
+    if order == 'C':
+        return np.ones(SHAPE)
+    elif order == 'F':
+        return np.ones(SHAPE, order='F')
+    elif order == 'strided':
+        return np.ones((2*SHAPE[0], 2*SHAPE[1]))[::2, ::2]
+    else:
+        raise ValueError('invalid order')
+
+def peak_rss():
+    # ru_maxrss is in kilobytes on Linux:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024
+
+def run(order):
+    x = make(order)
+    rss = peak_rss()
+    start = time.time()
+    chash(x)
+    t = time.time()-start
+    print '%-10s %14.1f %10.2f' % (order, (peak_rss()-rss)/2.0**20,
+                                   x.nbytes/t/1e9)
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(sys.argv[1])
+    else:
+        # Run each case in a fresh process so that peak RSS is comparable:
+        print '%-10s %14s %10s' % ('order', 'peak +RSS (MB)', 'GB/s')
+        for order in ['C', 'F', 'strided']:
+            sys.stdout.flush()
+            subprocess.check_call([sys.executable, __file__, order])
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+
+"""
+Speedup of vectorized hashing of homogeneous scalar sequences.
+"""
+
+import timeit
+
+from chash import chash
+
+N = 1000000
+
+CASES = [
+    ('ints', lambda: range(N)),
+    ('floats', lambda: [float(i) for i in xrange(N)]),
+    ('strs', lambda: [str(i) for i in xrange(N)]),
+    ('unicode', lambda: [unicode(i) for i in xrange(N)]),
+    ('bool tuple', lambda: tuple(bool(i % 2) for i in xrange(N))),
+]
+
+def bench(x, vectorize, repeat=3):
+    return min(timeit.repeat(lambda: chash(x, vectorize=vectorize),
+                             number=1, repeat=repeat))
+
+if __name__ == '__main__':
+    print '%-12s %12s %12s %8s' % ('case', 'default (s)', 'vector (s)',
+                                   'speedup')
+    for name, make in CASES:
+        x = make()
+        t0 = bench(x, False)
+        t1 = bench(x, True)
+        print '%-12s %12.4f %12.4f %8.1f' % (name, t0, t1, t0/t1)
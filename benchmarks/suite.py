@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+
+"""
+Benchmark suite covering the hot paths of chash and ccache.
+
+Runs each benchmark, prints a table of the per-call times and optionally
+writes them to a JSON file. If a baseline file written by a previous run is
+specified, the times are compared with it and the script exits with a nonzero
+status if any benchmark is slower than its baseline by more than the
+threshold, e.g.::
+
+  python suite.py -o baseline.json
+  # ... upgrade or modify the package ...
+  python suite.py --compare baseline.json
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import re
+import sys
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from chash import chash as chash_, lfu_cache_method
+
+def _nested(depth, width):
+    if depth == 0:
+        return range(width)
+    return {str(i): [_nested(depth-1, width), i] for i in xrange(width)}
+
+def _func(x, y=2):
+    return [x+y for i in xrange(10)]
+
+def _hash(x, **options):
+    return lambda: chash_(x, **options)
+
+def bench_ndarray_c():
+    return _hash(np.random.rand(2**23))
+
+def bench_ndarray_small():
+    return _hash(np.random.rand(10))
+
+def bench_ndarray_f():
+    return _hash(np.asfortranarray(np.random.rand(2**12, 2**11)))
+
+def bench_dataframe_tall():
+    n = 10**6
+    df = pd.DataFrame({'i': np.arange(n), 'f': np.random.rand(n),
+                       'b': np.random.rand(n) > 0.5,
+                       'g': np.random.rand(n)})
+    return _hash(df)
+
+def bench_dataframe_wide():
+    n = 1000
+    data = {}
+    for i in xrange(500):
+        data['f%i' % i] = np.random.rand(n)
+        data['i%i' % i] = np.arange(n)
+    return _hash(pd.DataFrame(data))
+
+def bench_dataframe_object():
+    n = 10**5
+    return _hash(pd.DataFrame({'s': [str(i) for i in xrange(n)],
+                               'f': np.random.rand(n)}))
+
+def bench_multiindex():
+    return _hash(pd.MultiIndex.from_product([range(1000), list('abcdefghij'),
+                                             range(10)]))
+
+def bench_nested():
+    return _hash(_nested(4, 8))
+
+def bench_nested_vectorized():
+    return _hash(_nested(4, 8), vectorize=True)
+
+def bench_string():
+    return _hash('x'*2**26)
+
+def bench_function():
+    return _hash(_func)
+
+def bench_lfu_hit():
+    class Foo(object):
+        @lfu_cache_method(128, 0)
+        def meth(self, x):
+            return x
+
+    f = Foo()
+    return lambda: f.meth(1)
+
+def bench_lfu_miss():
+    class Foo(object):
+        @lfu_cache_method(128, 0)
+        def meth(self, x):
+            return x
+
+    f = Foo()
+    keys = itertools.count()
+    return lambda: f.meth(next(keys))
+
+def bench_lfu_hit_array():
+    class Foo(object):
+        @lfu_cache_method(128, 0)
+        def meth(self, x):
+            return x
+
+    f = Foo()
+    x = np.random.rand(1000)
+    return lambda: f.meth(x)
+
+# Benchmark names and setup functions that return the function to time:
+BENCHMARKS = [(name[len('bench_'):], func) for name, func in \
+              sorted(globals().items()) if name.startswith('bench_')]
+
+def run(pattern=None, repeat=5, min_time=0.2):
+    """
+    Run the benchmarks whose names match a regular expression.
+
+    Each benchmark is called enough times per repetition to take at least
+    `min_time` seconds; the best and median times per call over all
+    repetitions are reported.
+    """
+
+    results = {}
+    for name, setup in BENCHMARKS:
+        if pattern is not None and not re.search(pattern, name):
+            continue
+        f = setup()
+        number = 1
+        while True:
+            t = timeit.timeit(f, number=number)
+            if t >= min_time or number >= 10**6:
+                break
+            number *= 10
+        times = sorted(t/number for t in \
+                       timeit.repeat(f, number=number, repeat=repeat))
+        results[name] = {'best': times[0], 'median': times[len(times)//2],
+                         'number': number}
+        print '%-20s %12s %12s' % (name, _format(times[0]),
+                                   _format(times[len(times)//2]))
+        sys.stdout.flush()
+    return results
+
+def _format(t):
+    for unit, scale in [('s', 1), ('ms', 1e3), ('us', 1e6), ('ns', 1e9)]:
+        if t*scale >= 1:
+            break
+    return '%.3g %s' % (t*scale, unit)
+
+def compare(results, baseline, threshold):
+    """
+    Compare the best times with a baseline and return the names of the
+    benchmarks that regressed by more than the threshold.
+    """
+
+    regressions = []
+    print
+    print '%-20s %12s %12s %8s' % ('benchmark', 'baseline', 'current',
+                                   'ratio')
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        old = baseline[name]['best']
+        new = results[name]['best']
+        ratio = new/old
+        flag = ''
+        if ratio > 1+threshold:
+            regressions.append(name)
+            flag = ' REGRESSION'
+        print '%-20s %12s %12s %8.2f%s' % (name, _format(old), _format(new),
+                                          ratio, flag)
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-o', '--output',
+                        help='write the results to this JSON file')
+    parser.add_argument('-c', '--compare', metavar='BASELINE',
+                        help='compare the results with this JSON file')
+    parser.add_argument('-t', '--threshold', type=float, default=0.2,
+                        help='relative slowdown deemed a regression '
+                        '(default: %(default)s)')
+    parser.add_argument('-k', '--pattern',
+                        help='only run benchmarks matching this regex')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='number of repetitions (default: %(default)s)')
+    args = parser.parse_args()
+
+    print '%-20s %12s %12s' % ('benchmark', 'best', 'median')
+    results = run(args.pattern, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'meta': {'time': time.time(),
+                                'python': platform.python_version(),
+                                'platform': platform.platform(),
+                                'numpy': np.__version__,
+                                'pandas': pd.__version__},
+                       'results': results}, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
@@ -3,4 +3,6 @@ Content-based hash tools.
 """
 
 from ccache import *
-from chash import chash
+from merkle import MerkleTree
+from chash import chash, chash_file, chash_many, chash_rows, chash_columns, \
+    diff_frames, register_hasher, DigestMemo, HashProfile
@@ -10,15 +10,151 @@ Content-based cache.
 # http://www.opensource.org/licenses/bsd-license
 
 import chash
+import atexit
 import cachetools
+import collections
+import cPickle
+import errno
 import functools
-import inspect
+import heapq
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import timeit
 
-def _cachedmethod(cache, key_idx=None, hash_func=chash.chash, enabled=True):
+import numpy as np
+
+# Flag set in the code of functions that accept **kwargs:
+_CO_VARKEYWORDS = 0x08
+
+# Clock used to measure latencies and computation times (the most precise
+# available, as used by chash.HashProfile):
+_timer = timeit.default_timer
+
+class _InFlight(object):
+    """
+    Computation of a result awaited by one or more callers.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+    def wait(self):
+        self.done.wait()
+        if self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+        return self.result
+
+class LatencyHistogram(object):
+    """
+    Histogram of latencies with power-of-two bucket widths.
+
+    Bucket `i` of `counts` contains the number of latencies of at least
+    `2**(i-1)` and less than `2**i` nanoseconds (bucket 0 contains latencies
+    shorter than 1 ns).
+    """
+
+    def __init__(self):
+        self.counts = [0]*64
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, t):
+        """
+        Record a latency in seconds.
+        """
+
+        self.counts[min(int(t*1e9).bit_length(), 63)] += 1
+        self.count += 1
+        self.total += t
+        if t > self.max:
+            self.max = t
+
+    @property
+    def mean(self):
+        return self.total/self.count if self.count else 0.0
+
+    def percentile(self, q):
+        """
+        Return an upper bound of the specified percentile of the latencies in
+        seconds, i.e., the upper edge of the bucket containing it.
+        """
+
+        rank = q/100.0*self.count
+        n = 0
+        for i, count in enumerate(self.counts):
+            n += count
+            if n >= rank and n:
+                return min(2**i*1e-9, self.max)
+        return 0.0
+
+class CacheStats(object):
+    """
+    Usage statistics of a memoized method's cache.
+
+    Attributes
+    ----------
+    hits, misses : int
+        Number of calls whose results were (or weren't) found in the cache.
+        Calls that wait for a result computed by a concurrent call are
+        counted as misses.
+    evictions : int
+        Number of entries evicted or expired when storing new results.
+    hash_time : float
+        Total time in seconds spent hashing arguments.
+    compute_time : float
+        Total time in seconds spent executing the method.
+    hit_latency, miss_latency : LatencyHistogram
+        Latencies of calls that hit and missed the cache.
+
+    Notes
+    -----
+    The statistics are updated without locking, so they might be slightly
+    inaccurate when the method is called concurrently by several threads.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Reset all statistics.
+        """
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.hash_time = 0.0
+        self.compute_time = 0.0
+        self.hit_latency = LatencyHistogram()
+        self.miss_latency = LatencyHistogram()
+
+    @property
+    def hit_rate(self):
+        calls = self.hits+self.misses
+        return float(self.hits)/calls if calls else 0.0
+
+    def __repr__(self):
+        return '%s(hits=%i, misses=%i, evictions=%i, hash_time=%g, ' \
+            'compute_time=%g)' % (self.__class__.__name__, self.hits,
+                                  self.misses, self.evictions, self.hash_time,
+                                  self.compute_time)
+
+def _cachedmethod(cache, key_idx=None, hash_func=chash.chash, enabled=True,
+                  memo=None, algo=None, coalesce=False, thread_safe=False,
+                  stats=False, canonical=False, include_code=False,
+                  bound=True, vectorize=False, parallel=False):
     """Class instance method memoization decorator.
 
     Memoizes the returned value of a class instance method by hashing the
-    specified arguments to the hash.
+    specified arguments to the hash. Static and class methods may also be
+    decorated (above the `staticmethod` or `classmethod` decorator).
 
     Parameters
     ----------
@@ -34,53 +170,1177 @@ def _cachedmethod(cache, key_idx=None, hash_func=chash.chash, enabled=True):
         Function to use when hashing arguments.
     enabled : bool
         If False, don't cache any results.
+    memo : chash.DigestMemo
+        Memo of argument hashes keyed on argument identity; `hash_func` must
+        accept it as a `memo` keyword argument.
+    algo : str
+        Hash algorithm (see `chash.chash`); `hash_func` must accept it as an
+        `algo` keyword argument. If None, the default of `hash_func` is used.
+    coalesce : bool
+        If True, concurrent calls (e.g., from several threads) that miss the
+        cache with the same key share a single execution of the method: the
+        first caller executes it while the others wait for its result (or
+        exception).
+    thread_safe : bool
+        If True, serialize accesses to `cache` with a lock so that it may be
+        shared by several threads even if it isn't thread-safe itself, and
+        coalesce concurrent calls that miss the cache with the same key (see
+        `coalesce`) so that only one thread computes a missing result while
+        the others wait. Arguments are hashed and results computed outside of
+        the lock.
+    stats : bool
+        If True, record the cache's usage in a `CacheStats` instance
+        accessible as the `stats` attribute of the wrapped method (which is
+        None otherwise).
+    canonical : bool
+        If True, hash dicts, sets and frozensets in arguments independently of
+        their iteration order (see `chash.chash`); `hash_func` must accept a
+        `canonical` keyword argument.
+    include_code : bool
+        If True, combine the key with the digest of the method's code so that
+        results cached by a different version of the method (e.g., in a
+        persistent cache) aren't used.
+    bound : bool
+        If False, the first argument of the decorated function (or class
+        method) is treated like the others rather than omitted from the key.
+    vectorize, parallel : bool
+        If True, hash homogeneous lists and tuples in arguments in bulk, or
+        large arrays in parallel (see `chash.chash`); `hash_func` must accept
+        `vectorize` and `parallel` keyword arguments.
+
+    Notes
+    -----
+    Positional and keyword arguments are bound to the method's parameters
+    before hashing, so that `f(1, y=2)` and `f(1, 2)` share a key; if
+    `key_idx` is None, keyword arguments collected by `**kwargs` are also
+    hashed (in the order of their names). Results that `cache` rejects as too
+    large (by raising ValueError) are not cached. If `cache` is a
+    `GDSFCache`, the time taken by the method to compute each result is used
+    as the result's cost.
     """
 
+    stats = CacheStats() if stats else None
+    options = {}
+    if memo is not None:
+        options['memo'] = memo
+    if algo is not None:
+        options['algo'] = algo
+    if canonical:
+        options['canonical'] = True
+    if vectorize:
+        options['vectorize'] = True
+    if parallel:
+        options['parallel'] = True
+    if options:
+        hash_func = functools.partial(hash_func, **options)
+    if isinstance(cache, GDSFCache):
+        store = cache.add
+    else:
+        def store(key, result, cost):
+            cache[key] = result
+    if thread_safe:
+        coalesce = True
+        lock = threading.Lock()
+
+        def get(key):
+            with lock:
+                return cache[key]
+    else:
+        lock = None
+        get = cache.__getitem__
+
+    # Caches whose lengths are costly to measure (e.g., DiskCache) count
+    # their own evictions:
+    counts_evictions = hasattr(cache, 'evictions')
+
+    def put(key, result, cost):
+        if lock is not None:
+            lock.acquire()
+        try:
+            if stats is None:
+                store(key, result, cost)
+            elif counts_evictions:
+                n = cache.evictions
+                store(key, result, cost)
+                stats.evictions += cache.evictions-n
+            else:
+
+                # Entries that disappear while a new one is stored are evicted
+                # (or expired):
+                n = len(cache)
+                store(key, result, cost)
+                stats.evictions += max(n+1-len(cache), 0)
+        except ValueError:
+
+            # The result is too large to be cached:
+            pass
+        finally:
+            if lock is not None:
+                lock.release()
+
     def decorator_disabled(method):
         return method
 
     def decorator_enabled(method):
-        argspec = inspect.getargspec(method)
-        def wrapper(self, *args, **kwargs):
-
-            # Combine all specified parameters (or their defaults) in a single
-            # tuple:
-            len_args = len(args)
-            if argspec.defaults is not None:
-                args += tuple(kwargs[k] if kwargs.has_key(k) \
-                              else argspec.defaults[-(len(argspec.args)-len_args-1)+i] \
-                              for i, k in enumerate(argspec.args[len_args+1:]))
-
-            # Hash only the selected argument values:
-            if key_idx is not None:
-                key = hash_func(args[key_idx])
+
+        # Decorate the functions underlying static and class methods; the
+        # first argument of methods (self or cls) is omitted from the key:
+        if isinstance(method, staticmethod):
+            return staticmethod(decorate(method.__func__, 0))
+        elif isinstance(method, classmethod):
+            return classmethod(decorate(method.__func__, int(bound)))
+        return decorate(method, int(bound))
+
+    def decorate(func, first):
+
+        # Analyze the function's signature once (as inspect.getargspec would,
+        # without importing inspect); the default values are keyed on the names
+        # of the arguments following the omitted ones:
+        code = func.func_code
+        names = code.co_varnames[first:code.co_argcount]
+        n_names = len(names)
+        defaults = func.func_defaults or ()
+        defaults = dict(zip(names[n_names-len(defaults):], defaults))
+
+        # Keyword arguments collected by **kwargs are included in the key if
+        # all arguments are used:
+        if code.co_flags & _CO_VARKEYWORDS and key_idx is None:
+            names_set = frozenset(names)
+        else:
+            names_set = None
+
+        # A single selected argument can be hashed directly if it is passed
+        # positionally:
+        if isinstance(key_idx, (int, long)) and 0 <= key_idx < n_names:
+            direct_idx = first+key_idx
+        else:
+            direct_idx = sys.maxint
+
+        # The digest of the function's code is combined with the argument
+        # hashes so that results computed by other versions of the function
+        # aren't used:
+        code_key = hash_func(code) if include_code else 0
+
+        # Computations in progress keyed on argument hash:
+        in_flight = {}
+
+        def compute(key, args, kwargs):
+            start = _timer()
+            result = func(*args, **kwargs)
+            cost = _timer()-start
+            if stats is not None:
+                stats.compute_time += cost
+            put(key, result, cost)
+            return result
+
+        def wrapper(*args, **kwargs):
+            if stats is not None:
+                start = _timer()
+            if direct_idx < len(args):
+                key = hash_func(args[direct_idx])
             else:
-                key = hash_func(args)
+
+                # Combine all specified parameters (or their defaults) in a
+                # single tuple:
+                n_args = len(args)-first
+                if n_args < n_names:
+                    try:
+                        args_all = args[first:]+tuple(kwargs[k] \
+                                                      if k in kwargs \
+                                                      else defaults[k] \
+                                                      for k in names[n_args:])
+                    except KeyError:
+
+                        # Let the function report the missing argument:
+                        return func(*args, **kwargs)
+                else:
+                    args_all = args[first:]
+                if names_set is not None:
+                    args_all = (args_all,
+                                tuple(sorted((k, v) for k, v in \
+                                             kwargs.iteritems() \
+                                             if k not in names_set)))
+
+                # Hash only the selected argument values:
+                if key_idx is not None:
+                    key = hash_func(args_all[key_idx])
+                else:
+                    key = hash_func(args_all)
+            if code_key:
+                key ^= code_key
+            if stats is not None:
+                stats.hash_time += _timer()-start
 
             # Try to use the cache:
             try:
-                return cache[key]
+                result = get(key)
             except KeyError:
                 pass
+            else:
+                if stats is not None:
+                    stats.hits += 1
+                    stats.hit_latency.add(_timer()-start)
+                return result
+            if stats is not None:
+                stats.misses += 1
 
-            # Execute method if no cache hit occurs:
-            result = method(self, *args, **kwargs)
-            cache[key] = result
+            if not coalesce:
+
+                # Execute the function if no cache hit occurs:
+                result = compute(key, args, kwargs)
+            else:
+
+                # Wait for the result if another caller is already computing
+                # it:
+                call = _InFlight()
+                pending = in_flight.setdefault(key, call)
+                if pending is not call:
+                    result = pending.wait()
+                else:
+                    try:
+
+                        # The result may have been cached just before this call
+                        # was registered:
+                        try:
+                            call.result = get(key)
+                        except KeyError:
+                            call.result = compute(key, args, kwargs)
+                    except:
+                        call.exc_info = sys.exc_info()
+                        raise
+                    finally:
+                        del in_flight[key]
+                        call.done.set()
+                    result = call.result
+            if stats is not None:
+                stats.miss_latency.add(_timer()-start)
             return result
 
         # Make the cache accessible as an attribute of the wrapped function for
         # diagnostic purposes:
         wrapper.cache = cache
-        return functools.update_wrapper(wrapper, method)
+        wrapper.memo = memo
+        wrapper.stats = stats
+        return functools.update_wrapper(wrapper, func)
 
     if enabled:
         return decorator_enabled
     else:
         return decorator_disabled
 
-def lfu_cache_method(maxsize=128, key_idx=0, hash_func=chash.chash, enabled=True):
-    return _cachedmethod(cachetools.LFUCache(maxsize), key_idx, hash_func,
-            enabled)
+def _getsizeof(value):
+    """
+    Return the approximate memory used by a cached result in bytes.
+
+    The memory used by numpy arrays is measured by their `nbytes` attribute
+    and that of pandas objects by their deep memory usage, i.e., including
+    Python objects stored in them.
+    """
+
+    pd = chash._pandas_if_loaded()
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    elif pd is None:
+        return sys.getsizeof(value)
+    elif isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    elif isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    else:
+        return sys.getsizeof(value)
+
+def _make_cache(cls, maxsize, max_bytes, *args):
+    """
+    Create a cache bounded by either the number or the size of its entries.
+    """
+
+    if max_bytes is None:
+        return cls(maxsize, *args)
+    else:
+        return cls(max_bytes, *args, getsizeof=_getsizeof)
+
+def lfu_cache_method(maxsize=128, key_idx=0, hash_func=chash.chash, enabled=True,
+                     memo=None, algo=None, coalesce=False, thread_safe=False,
+                     max_bytes=None, stats=False, canonical=False,
+                     vectorize=False, parallel=False):
+    """
+    Memoize a method in a least frequently used cache.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of cached results.
+    max_bytes : int
+        If not None, bound the total size of the cached results in bytes
+        (see `_getsizeof`) instead of their number.
+
+    See `_cachedmethod` for the other parameters.
+    """
+
+    return _cachedmethod(_make_cache(cachetools.LFUCache, maxsize, max_bytes),
+            key_idx, hash_func, enabled, memo, algo, coalesce, thread_safe,
+            stats, canonical, vectorize=vectorize, parallel=parallel)
+
+def lru_cache_method(maxsize=128, key_idx=0, hash_func=chash.chash, enabled=True,
+                     memo=None, algo=None, coalesce=False, thread_safe=False,
+                     max_bytes=None, stats=False, canonical=False,
+                     vectorize=False, parallel=False):
+    """
+    Memoize a method in a least recently used cache.
+
+    See `lfu_cache_method` for the parameters.
+    """
+
+    return _cachedmethod(_make_cache(cachetools.LRUCache, maxsize, max_bytes),
+            key_idx, hash_func, enabled, memo, algo, coalesce, thread_safe,
+            stats, canonical, vectorize=vectorize, parallel=parallel)
+
+def ttl_cache_method(maxsize=128, ttl=600, key_idx=0, hash_func=chash.chash,
+                     enabled=True, memo=None, algo=None, coalesce=False,
+                     thread_safe=False, max_bytes=None, stats=False,
+                     canonical=False, vectorize=False, parallel=False):
+    """
+    Memoize a method in a least recently used cache whose entries expire.
+
+    Parameters
+    ----------
+    ttl : float
+        Time in seconds after which a cached result expires.
+
+    See `lfu_cache_method` for the other parameters.
+    """
+
+    return _cachedmethod(_make_cache(cachetools.TTLCache, maxsize, max_bytes,
+                                     ttl),
+            key_idx, hash_func, enabled, memo, algo, coalesce, thread_safe,
+            stats, canonical, vectorize=vectorize, parallel=parallel)
+
+class ARCCache(collections.MutableMapping):
+    """
+    Adaptive replacement cache.
+
+    Entries accessed once are kept in a recency list and those accessed more
+    than once in a frequency list; the keys of entries recently evicted from
+    either list are remembered, and a hit on such a key shifts the target
+    share of the cache allotted to the recency list in favor of the list the
+    key was evicted from. This makes the cache resistant to scans of entries
+    that are accessed only once, which flush LRU caches.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum total size of the cached entries.
+    getsizeof : callable
+        Function that returns the size of an entry's value; if None, the size
+        of each entry is 1.
+
+    Notes
+    -----
+    The sizes of the lists and of the target share are measured with
+    `getsizeof` so that the cache adapts to entries of different sizes.
+
+    References
+    ----------
+    N. Megiddo and D. Modha, "ARC: A self-tuning, low overhead replacement
+    cache," in Proc. 2nd USENIX Conf. File and Storage Technologies, 2003.
+    """
+
+    def __init__(self, maxsize, getsizeof=None):
+        self.maxsize = maxsize
+        if getsizeof is not None:
+            self.getsizeof = getsizeof
+        self._data = {}
+
+        # Keys of cached entries (t1, t2) and of evicted entries (b1, b2) in
+        # LRU order mapped to their sizes; 1 denotes the recency list and 2
+        # the frequency list:
+        self._t1 = collections.OrderedDict()
+        self._t2 = collections.OrderedDict()
+        self._b1 = collections.OrderedDict()
+        self._b2 = collections.OrderedDict()
+        self._sizes = {'t1': 0, 't2': 0, 'b1': 0, 'b2': 0}
+
+        # Target size of t1:
+        self.p = 0
+
+    @staticmethod
+    def getsizeof(value):
+        return 1
+
+    @property
+    def currsize(self):
+        return self._sizes['t1']+self._sizes['t2']
+
+    def _pop(self, name, key):
+        size = getattr(self, '_'+name).pop(key)
+        self._sizes[name] -= size
+        return size
+
+    def _push(self, name, key, size):
+        getattr(self, '_'+name)[key] = size
+        self._sizes[name] += size
+
+    def _replace(self, in_b2=False):
+        """
+        Evict an entry from t1 or t2 and remember its key.
+        """
+
+        t1 = self._sizes['t1']
+        if self._t1 and (t1 > self.p or (in_b2 and t1 == self.p) or \
+                         not self._t2):
+            src, dst = 't1', 'b1'
+        else:
+            src, dst = 't2', 'b2'
+        key = next(iter(getattr(self, '_'+src)))
+        self._push(dst, key, self._pop(src, key))
+        return key, self._data.pop(key)
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        if key in self._t1:
+            self._push('t2', key, self._pop('t1', key))
+        else:
+            self._push('t2', key, self._pop('t2', key))
+        return value
+
+    def __setitem__(self, key, value):
+        size = self.getsizeof(value)
+        if size > self.maxsize:
+            raise ValueError('value too large')
+        in_b2 = False
+        if key in self._data:
+            self._pop('t1' if key in self._t1 else 't2', key)
+            del self._data[key]
+            dst = 't2'
+        elif key in self._b1:
+
+            # Favor recency (the evicted keys may all have size 0):
+            ratio = max(float(self._sizes['b2'])/max(self._sizes['b1'], 1),
+                        1)
+            self.p = min(self.p+ratio*self._pop('b1', key), self.maxsize)
+            dst = 't2'
+        elif key in self._b2:
+
+            # Favor frequency:
+            ratio = max(float(self._sizes['b1'])/max(self._sizes['b2'], 1),
+                        1)
+            self.p = max(self.p-ratio*self._pop('b2', key), 0)
+            dst, in_b2 = 't2', True
+        else:
+            dst = 't1'
+        while self.currsize+size > self.maxsize:
+            self._replace(in_b2)
+
+        # Forget the oldest evicted keys so that the recency list and its
+        # evicted keys fit in the cache and all keys fit in twice the cache:
+        while self._b1 and \
+              self._sizes['t1']+self._sizes['b1']+size > self.maxsize:
+            self._pop('b1', next(iter(self._b1)))
+        while self._b2 and \
+              self.currsize+self._sizes['b1']+self._sizes['b2']+size > \
+              2*self.maxsize:
+            self._pop('b2', next(iter(self._b2)))
+        self._push(dst, key, size)
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        del self._data[key]
+        self._pop('t1' if key in self._t1 else 't2', key)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def popitem(self):
+        """
+        Evict an entry and return its `(key, value)` pair.
+        """
+
+        if not self._data:
+            raise KeyError('%s is empty' % self.__class__.__name__)
+        return self._replace()
+
+def arc_cache_method(maxsize=128, key_idx=0, hash_func=chash.chash, enabled=True,
+                     memo=None, algo=None, coalesce=False, thread_safe=False,
+                     max_bytes=None, stats=False, canonical=False,
+                     vectorize=False, parallel=False):
+    """
+    Memoize a method in an adaptive replacement cache.
+
+    See `ARCCache` for a description of the cache and `lfu_cache_method` for
+    the parameters.
+    """
+
+    return _cachedmethod(_make_cache(ARCCache, maxsize, max_bytes),
+            key_idx, hash_func, enabled, memo, algo, coalesce, thread_safe,
+            stats, canonical, vectorize=vectorize, parallel=parallel)
+
+class GDSFCache(collections.MutableMapping):
+    """
+    Cost-aware cache with Greedy-Dual-Size-Frequency replacement.
+
+    Each entry has a priority equal to the cache's inflation value plus the
+    product of the entry's access count and its cost divided by its size;
+    the entry with the lowest priority is evicted first, and its priority
+    becomes the new inflation value so that entries that are no longer
+    accessed eventually age out. Cheap and large results are thus evicted
+    before expensive and small ones.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum total size of the cached entries.
+    getsizeof : callable
+        Function that returns the size of an entry's value; if None, the size
+        of each entry is 1.
+
+    Notes
+    -----
+    Entries stored with `add` have the specified cost, e.g., the time taken
+    to compute them; entries stored by assignment have a cost of 1.
+
+    References
+    ----------
+    L. Cherkasova, "Improving WWW proxies performance with Greedy-Dual-Size-
+    Frequency caching policy," HP Laboratories Technical Report
+    HPL-98-69R1, 1998.
+    """
+
+    def __init__(self, maxsize, getsizeof=None):
+        self.maxsize = maxsize
+        if getsizeof is not None:
+            self.getsizeof = getsizeof
+        self.currsize = 0
+        self.inflation = 0.0
+
+        # Entries are mapped to [value, size, cost, count, priority]; the heap
+        # contains (priority, sequence number, key) tuples, some of which may
+        # be stale:
+        self._data = {}
+        self._heap = []
+        self._seq = itertools.count()
+
+    @staticmethod
+    def getsizeof(value):
+        return 1
+
+    def _prioritize(self, key, entry):
+        value, size, cost, count, _ = entry
+        entry[4] = priority = self.inflation+count*cost/float(max(size, 1))
+        heapq.heappush(self._heap, (priority, next(self._seq), key))
+
+        # Discard stale heap items when they outnumber the entries:
+        if len(self._heap) > 2*len(self._data)+16:
+            self._heap = [(e[4], next(self._seq), k) \
+                          for k, e in self._data.iteritems()]
+            heapq.heapify(self._heap)
+
+    def __getitem__(self, key):
+        entry = self._data[key]
+        entry[3] += 1
+        self._prioritize(key, entry)
+        return entry[0]
+
+    def add(self, key, value, cost):
+        """
+        Store a value with the specified cost.
+        """
+
+        size = self.getsizeof(value)
+        if size > self.maxsize:
+            raise ValueError('value too large')
+        count = 1
+        if key in self._data:
+            count = self._data[key][3]+1
+            del self[key]
+        while self.currsize+size > self.maxsize:
+            self.popitem()
+        entry = [value, size, max(cost, 0), count, 0]
+        self._data[key] = entry
+        self.currsize += size
+        self._prioritize(key, entry)
+
+    def __setitem__(self, key, value):
+        self.add(key, value, 1)
+
+    def __delitem__(self, key):
+        entry = self._data.pop(key)
+        self.currsize -= entry[1]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def popitem(self):
+        """
+        Evict the entry with the lowest priority and return its `(key, value)`
+        pair.
+        """
+
+        while self._heap:
+            priority, _, key = heapq.heappop(self._heap)
+            entry = self._data.get(key)
+            if entry is not None and entry[4] == priority:
+                self.inflation = priority
+                del self[key]
+                return key, entry[0]
+        raise KeyError('%s is empty' % self.__class__.__name__)
+
+def cost_cache_method(maxsize=128, key_idx=0, hash_func=chash.chash,
+                      enabled=True, memo=None, algo=None, coalesce=False,
+                      thread_safe=False, max_bytes=None, stats=False,
+                      canonical=False, vectorize=False, parallel=False):
+    """
+    Memoize a method in a cost-aware cache.
+
+    The cost of each result is the time taken to compute it; see `GDSFCache`
+    for a description of the cache and `lfu_cache_method` for the parameters.
+    """
+
+    return _cachedmethod(_make_cache(GDSFCache, maxsize, max_bytes),
+            key_idx, hash_func, enabled, memo, algo, coalesce, thread_safe,
+            stats, canonical, vectorize=vectorize, parallel=parallel)
+
+class DiskCache(collections.MutableMapping):
+    """
+    Size-bounded cache stored in a directory.
+
+    Each entry is stored in a subdirectory named after its key. Entries are
+    written to temporary subdirectories that are atomically renamed when
+    complete, so several processes can safely share the same directory.
+    When the total size of the entries exceeds the limit, the least recently
+    used ones are evicted.
+
+    Numpy arrays and pandas DataFrames whose blocks are numpy arrays are
+    stored in .npy files that are memory-mapped read-only when retrieved, so
+    retrieving them doesn't copy their contents; other values are pickled.
+
+    Parameters
+    ----------
+    path : str
+        Cache directory; it is created if it doesn't exist.
+    max_bytes : int
+        Maximum total size of the cached entries in bytes.
+
+    Notes
+    -----
+    Keys must be integers, e.g., hashes computed by `chash.chash`. Results of
+    different functions should not be stored in the same directory.
+
+    The total size of the entries is tracked as they are stored rather than
+    measured each time; the directory is only scanned when the size limit
+    is exceeded or after an eighth of the limit has been stored since the
+    last scan, so entries stored by other processes may temporarily exceed
+    the limit. The `evictions` attribute counts the entries evicted by the
+    instance.
+    """
+
+    def __init__(self, path, max_bytes=2**30):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        try:
+            os.makedirs(path)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        # Total size of the entries as of the last scan of the directory plus
+        # the sizes of the entries stored (and minus those removed) by this
+        # instance since, and the number of bytes stored since the scan:
+        self._size = None
+        self._written = 0
+
+    def _entry_path(self, key):
+        if not isinstance(key, (int, long)):
+            raise TypeError('key must be an integer')
+        return os.path.join(self.path, '%x' % key)
+
+    def _entries(self):
+        """
+        Return the names of all complete entries.
+        """
+
+        return [name for name in os.listdir(self.path) \
+                if not name.startswith('.')]
+
+    def __getitem__(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(os.path.join(path, 'meta.pkl'), 'rb') as f:
+                kind, meta = cPickle.load(f)
+            if kind == 'ndarray':
+                value = self._load_array(path, 0)
+            elif kind == 'dataframe':
+                pd = chash._import_pandas()
+                index, columns, placements = meta
+                blocks = [pd.core.internals.make_block(
+                    self._load_array(path, i), placement=placement) \
+                    for i, placement in enumerate(placements)]
+                value = pd.DataFrame(pd.core.internals.BlockManager(
+                    blocks, [columns, index]))
+            else:
+                value = meta
+
+            # Record the access for LRU eviction:
+            os.utime(path, None)
+        except (IOError, OSError):
+            raise KeyError(key)
+        return value
+
+    def _load_array(self, path, i):
+        filename = os.path.join(path, '%i.npy' % i)
+        try:
+            return np.load(filename, mmap_mode='r')
+        except ValueError:
+
+            # Arrays of Python objects can't be memory-mapped:
+            return np.load(filename, allow_pickle=True)
+
+    def __setitem__(self, key, value):
+        path = self._entry_path(key)
+        pd = chash._pandas_if_loaded()
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=self.path)
+        try:
+            if isinstance(value, np.ndarray):
+                np.save(os.path.join(tmp, '0.npy'), value)
+                kind, meta = 'ndarray', None
+            elif pd is not None and isinstance(value, pd.DataFrame) and \
+                 all(isinstance(b.values, np.ndarray) \
+                     for b in value._data.blocks):
+                placements = []
+                for i, b in enumerate(value._data.blocks):
+                    np.save(os.path.join(tmp, '%i.npy' % i), b.values)
+                    placements.append(b.mgr_locs.as_array)
+                kind, meta = 'dataframe', \
+                    (value.index, value.columns, placements)
+            else:
+                kind, meta = 'pickle', value
+            with open(os.path.join(tmp, 'meta.pkl'), 'wb') as f:
+                cPickle.dump((kind, meta), f, cPickle.HIGHEST_PROTOCOL)
+            size = self._entry_size(tmp)
+            if os.path.exists(path):
+                self._discard(path)
+            try:
+                os.rename(tmp, path)
+            except OSError:
+
+                # Another process stored the same entry first:
+                pass
+            else:
+                if self._size is not None:
+                    self._size += size
+                self._written += size
+        finally:
+            shutil.rmtree(tmp, True)
+        if self._size is None or self._size > self.max_bytes or \
+           self._written > self.max_bytes//8:
+            self._evict()
+
+    def _entry_size(self, path):
+        return sum(os.path.getsize(os.path.join(path, f)) \
+                   for f in os.listdir(path))
+
+    def _remove(self, path):
+        """
+        Atomically remove an entry directory.
+        """
+
+        tmp = tempfile.mkdtemp(prefix='.del-', dir=self.path)
+        try:
+            os.rename(path, os.path.join(tmp, 'entry'))
+        except OSError:
+            return False
+        finally:
+            shutil.rmtree(tmp, True)
+        return True
+
+    def _discard(self, path):
+        """
+        Remove an entry directory and deduct its size from the total.
+        """
+
+        try:
+            size = self._entry_size(path)
+        except OSError:
+            return False
+        if not self._remove(path):
+            return False
+        if self._size is not None:
+            self._size -= size
+        return True
+
+    def _scan(self):
+        """
+        Measure the total size of the entries.
+
+        Returns the access times, sizes and paths of the entries sorted by
+        access time.
+        """
+
+        entries = []
+        total = 0
+        for name in self._entries():
+            path = os.path.join(self.path, name)
+            try:
+                size = self._entry_size(path)
+                entries.append((os.path.getmtime(path), size, path))
+            except OSError:
+                continue
+            total += size
+        self._size = total
+        self._written = 0
+        entries.sort()
+        return entries
+
+    def _evict(self):
+        """
+        Evict least recently used entries until the size limit is satisfied.
+        """
+
+        for mtime, size, path in self._scan():
+            if self._size <= self.max_bytes:
+                break
+            if self._remove(path):
+                self.evictions += 1
+            self._size -= size
+
+    def __delitem__(self, key):
+        if not self._discard(self._entry_path(key)):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self._entry_path(key), 'meta.pkl'))
+
+    def __iter__(self):
+        for name in self._entries():
+            yield int(name, 16)
+
+    def __len__(self):
+        return len(self._entries())
+
+def disk_cache_method(path, max_bytes=2**30, key_idx=0, hash_func=chash.chash,
+                      enabled=True, memo=None, algo=None, coalesce=False,
+                      thread_safe=False, stats=False, canonical=False,
+                      vectorize=False, parallel=False):
+    """
+    Memoize a method in a cache stored in a directory.
+
+    Parameters
+    ----------
+    path : str
+        Cache directory (see `DiskCache`).
+    max_bytes : int
+        Maximum total size of the cached results in bytes.
+
+    See `_cachedmethod` for the other parameters.
+    """
+
+    return _cachedmethod(DiskCache(path, max_bytes), key_idx, hash_func,
+            enabled, memo, algo, coalesce, thread_safe, stats, canonical,
+            vectorize=vectorize, parallel=parallel)
+
+def _shared_memory_dir():
+    """
+    Return a directory in a memory-backed file system if one is available or
+    the system's temporary directory otherwise.
+    """
+
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+class SharedMemoryCache(DiskCache):
+    """
+    Size-bounded cache stored in shared memory.
+
+    A `DiskCache` stored in a memory-backed file system (/dev/shm on Linux)
+    whose directory is named after the cache, so that the processes of a host
+    (e.g., the workers of a `multiprocessing.Pool`) that open caches with the
+    same name share their entries. Numpy arrays and DataFrames retrieved from
+    the cache are read-only views of the shared memory, so they are neither
+    copied nor unpickled.
+
+    Parameters
+    ----------
+    name : str
+        Name of the cache.
+    max_bytes : int
+        Maximum total size of the cached entries in bytes.
+
+    Notes
+    -----
+    Entries outlive the processes that stored them until they are evicted,
+    removed (e.g., with `clear`) or the host is restarted. If no
+    memory-backed file system is available, the system's temporary directory
+    is used instead.
+    """
+
+    def __init__(self, name, max_bytes=2**28):
+        dirname = 'chash-%s' % name
+        if hasattr(os, 'getuid'):
+            dirname = 'chash-%i-%s' % (os.getuid(), name)
+        DiskCache.__init__(self, os.path.join(_shared_memory_dir(), dirname),
+                           max_bytes)
+
+def shared_cache_method(name, max_bytes=2**28, key_idx=0,
+                        hash_func=chash.chash, enabled=True, memo=None,
+                        algo=None, coalesce=False, thread_safe=False,
+                        stats=False, canonical=False,
+                        vectorize=False, parallel=False):
+    """
+    Memoize a method in a cache shared by processes.
+
+    Parameters
+    ----------
+    name : str
+        Name of the cache (see `SharedMemoryCache`); the results of different
+        methods should be stored in caches with different names.
+    max_bytes : int
+        Maximum total size of the cached results in bytes.
+
+    See `_cachedmethod` for the other parameters. Since the cache may
+    contain the results of many processes, a wide hash algorithm (e.g.,
+    'xxh64') makes key collisions less likely.
+    """
+
+    return _cachedmethod(SharedMemoryCache(name, max_bytes), key_idx,
+            hash_func, enabled, memo, algo, coalesce, thread_safe, stats,
+            canonical, vectorize=vectorize, parallel=parallel)
+
+class TieredCache(collections.MutableMapping):
+    """
+    Cache composed of a small fast tier in front of a large slow one.
+
+    Entries are looked up in the first tier (L1) and then in the second (L2);
+    entries found in L2 are promoted to L1 so that subsequent hits don't
+    retrieve (e.g., deserialize) them from L2 again. New entries are stored
+    in L1 and either immediately in L2 (write-through) or only when they are
+    evicted from L1 or the cache is flushed (write-back).
+
+    Parameters
+    ----------
+    l1 : dict-like
+        First tier, e.g., a `cachetools.LFUCache`.
+    l2 : dict-like
+        Second tier, e.g., a `DiskCache`.
+    write_back : bool
+        If True, defer storing new entries in L2 until they are evicted from
+        L1 or `flush` is called.
+
+    Attributes
+    ----------
+    hits : list of int
+        Numbers of lookups that found the entry in L1 and L2.
+    misses : int
+        Number of lookups that found the entry in neither tier.
+    promotions : int
+        Number of entries copied from L2 to L1.
+    demotions : int
+        Number of entries written back from L1 to L2.
+    evictions : int
+        Number of entries evicted from L2 if it counts them (see
+        `DiskCache`).
+
+    Notes
+    -----
+    Values too large for L1 (which raises ValueError) are only stored in L2.
+    Write-back entries that were not evicted from L1 are lost unless `flush`
+    is called before the cache is discarded.
+    """
+
+    def __init__(self, l1, l2, write_back=False):
+        self.l1 = l1
+        self.l2 = l2
+        self.write_back = write_back
+
+        # Values of the entries stored in L1 but not yet in L2:
+        self._dirty = {}
+        self.clear_stats()
+
+    def clear_stats(self):
+        """
+        Reset the hit, miss, promotion and demotion counts.
+        """
+
+        self.hits = [0, 0]
+        self.misses = 0
+        self.promotions = 0
+        self.demotions = 0
+
+    @property
+    def evictions(self):
+        return self.l2.evictions
+
+    def _demote(self, key):
+        value = self._dirty.pop(key)
+        try:
+            self.l2[key] = value
+        except ValueError:
+            pass
+        else:
+            self.demotions += 1
+
+    def _store_l1(self, key, value):
+        n = len(self.l1)
+        self.l1[key] = value
+
+        # Write back the entries that L1 evicted to make room (or expired):
+        if self._dirty and len(self.l1) <= n:
+            for k in [k for k in self._dirty if k not in self.l1]:
+                self._demote(k)
+
+    def __getitem__(self, key):
+        try:
+            value = self.l1[key]
+        except KeyError:
+            pass
+        else:
+            self.hits[0] += 1
+            return value
+        try:
+            value = self.l2[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits[1] += 1
+        try:
+            self._store_l1(key, value)
+        except ValueError:
+            pass
+        else:
+            self.promotions += 1
+        return value
+
+    def __setitem__(self, key, value):
+        try:
+            self._store_l1(key, value)
+        except ValueError:
+
+            # Don't leave a previous value of the entry in L1:
+            self._dirty.pop(key, None)
+            self.l1.pop(key, None)
+            self.l2[key] = value
+            return
+        if self.write_back:
+            self._dirty[key] = value
+        else:
+            try:
+                self.l2[key] = value
+            except ValueError:
+                pass
+
+    def __delitem__(self, key):
+        self._dirty.pop(key, None)
+        found = False
+        for tier in (self.l1, self.l2):
+            try:
+                del tier[key]
+            except KeyError:
+                pass
+            else:
+                found = True
+        if not found:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.l1 or key in self.l2
+
+    def __iter__(self):
+        for key in self.l1:
+            yield key
+        for key in self.l2:
+            if key not in self.l1:
+                yield key
+
+    def __len__(self):
+        return len(self.l2)+sum(1 for key in self.l1 if key not in self.l2)
+
+    def flush(self):
+        """
+        Store the write-back entries remaining in L1 in L2.
+        """
+
+        for key in self._dirty.keys():
+            self._demote(key)
+
+def tiered_cache_method(path, maxsize=128, max_bytes=None,
+                        disk_max_bytes=2**30, write_back=False, key_idx=0,
+                        hash_func=chash.chash, enabled=True, memo=None,
+                        algo=None, coalesce=False, thread_safe=False,
+                        stats=False, canonical=False,
+                        vectorize=False, parallel=False):
+    """
+    Memoize a method in a least frequently used cache backed by a disk cache.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the second tier (see `DiskCache`).
+    maxsize : int
+        Maximum number of results in the first tier.
+    max_bytes : int
+        If not None, bound the total size of the results in the first tier in
+        bytes (see `_getsizeof`) instead of their number.
+    disk_max_bytes : int
+        Maximum total size of the results in the second tier in bytes.
+    write_back : bool
+        If True, store results on disk only when they are evicted from the
+        first tier or at interpreter exit (see `TieredCache`).
+
+    See `_cachedmethod` for the other parameters. The per-tier hit counts are
+    accessible through the `cache` attribute of the wrapped method.
+    """
+
+    cache = TieredCache(_make_cache(cachetools.LFUCache, maxsize, max_bytes),
+                        DiskCache(path, disk_max_bytes), write_back)
+    if write_back:
+        atexit.register(cache.flush)
+    return _cachedmethod(cache, key_idx, hash_func, enabled, memo, algo,
+            coalesce, thread_safe, stats, canonical,
+            vectorize=vectorize, parallel=parallel)
+
+def memoize(cache=None, key_idx=None, hash_func=chash.chash, enabled=True,
+            memo=None, algo=None, coalesce=False, thread_safe=False,
+            stats=False, canonical=False, include_code=False, vectorize=False,
+            parallel=False):
+    """
+    Memoize a function, static method or class method.
+
+    Parameters
+    ----------
+    cache : dict-like
+        Cache; if None, a least frequently used cache of 128 results is used.
+    key_idx : int or slice
+        Indices of the arguments to hash (see `_cachedmethod`); unlike the
+        instance method decorators, the class passed to a class method is one
+        of the arguments and is hashed by its qualified name.
+    include_code : bool
+        If True, combine the key with the digest of the function's code so
+        that results cached by a different version of the function (e.g., in
+        a `DiskCache`) aren't used.
+
+    See `_cachedmethod` for the other parameters. To decorate a static or
+    class method, apply `memoize` above `staticmethod` or `classmethod`;
+    instance methods should be decorated with the `*_cache_method`
+    decorators, which omit `self` from the key.
+    """
+
+    if cache is None:
+        cache = cachetools.LFUCache(128)
+    return _cachedmethod(cache, key_idx, hash_func, enabled, memo, algo,
+            coalesce, thread_safe, stats, canonical, include_code, False,
+            vectorize, parallel)
 
 if __name__ == '__main__':
     class Foo(object):
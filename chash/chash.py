@@ -9,12 +9,1164 @@ Content-based hash.
 # Distributed under the terms of the BSD license:
 # http://www.opensource.org/licenses/bsd-license
 
-import inspect
+import collections
+import ctypes
+import ctypes.util
+import datetime
+import functools
+import io
+import itertools
+import logging
+import mmap
+import multiprocessing
+import multiprocessing.pool
+import os
+import sys
+import threading
+import timeit
+import types
+import weakref
 import numpy as np
-import pandas as pd
 import xxh
 
-def chash(x):
+# pandas is imported and the hashers of its types registered only when needed
+# (see _import_pandas):
+pd = None
+_pandas_lock = threading.Lock()
+
+class _Hasher64x2(object):
+    """
+    128-bit hash object composed of two differently seeded xxHash 64 hash
+    objects.
+    """
+
+    def __init__(self):
+        self._h = (xxh.Hasher64(0), xxh.Hasher64(1))
+
+    def update(self, data):
+        self._h[0].update(data)
+        self._h[1].update(data)
+
+    def digest(self):
+        return (self._h[0].digest() << 64) | self._h[1].digest()
+
+# Hash object classes and hash widths in bits of the supported algorithms:
+_algorithms = {'xxh32': (xxh.Hasher32, 32),
+               'xxh64': (xxh.Hasher64, 64),
+               'xxh64x2': (_Hasher64x2, 128)}
+
+# Use the system xxHash library to digest chunks of large buffers if it is
+# available because ctypes releases the GIL while calling into it; the digests
+# are identical to those computed by xxh. The library is looked up when first
+# needed because doing so may spawn processes:
+_libxxhash = None
+
+def _load_libxxhash():
+    """
+    Return the system xxHash library or False if it is unavailable.
+    """
+
+    global _libxxhash
+    if _libxxhash is None:
+        try:
+            lib = ctypes.CDLL(ctypes.util.find_library('xxhash'))
+            lib.XXH32.restype = ctypes.c_uint
+            lib.XXH32.argtypes = [ctypes.c_void_p, ctypes.c_size_t,
+                                  ctypes.c_uint]
+            lib.XXH64.restype = ctypes.c_ulonglong
+            lib.XXH64.argtypes = [ctypes.c_void_p, ctypes.c_size_t,
+                                  ctypes.c_ulonglong]
+        except (OSError, AttributeError, TypeError):
+            lib = False
+        _libxxhash = lib
+    return _libxxhash
+
+def _address(buf):
+    """
+    Return the address of an array's data.
+
+    Faster than `buf.ctypes.data`, which constructs a ctypes helper object.
+    """
+
+    return buf.__array_interface__['data'][0]
+
+def _hash_chunk(buf, algo='xxh32'):
+    """
+    Compute the digest of a contiguous uint8 array.
+
+    Returns
+    -------
+    digest : list
+        Digest as a list of 32-bit (for xxh32) or 64-bit words.
+    """
+
+    lib = _load_libxxhash()
+    if algo == 'xxh32':
+        if lib:
+            return [lib.XXH32(_address(buf), buf.nbytes, 0)]
+        else:
+            return [xxh.hash32(_unowned(buf))]
+    seeds = [0] if algo == 'xxh64' else [0, 1]
+    if lib:
+        return [lib.XXH64(_address(buf), buf.nbytes, seed) \
+                for seed in seeds]
+    else:
+        return [xxh.hash64(_unowned(buf), seed) for seed in seeds]
+
+def _unowned(buf):
+    """
+    Alias the memory of a contiguous array without referencing the array.
+
+    xxh's hashers never release the buffers passed to them, so hashing an
+    array directly would keep it alive indefinitely; hashing the returned
+    object instead only leaks the latter.
+    """
+
+    return (ctypes.c_char*buf.nbytes).from_address(_address(buf))
+
+def _iter_tiles(x, tile_size):
+    """
+    Iterate over the bytes of an array in C order.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Array.
+    tile_size : int
+        Maximum number of bytes copied at a time when `x` is not C-contiguous;
+        at least one element is always copied.
+
+    Returns
+    -------
+    tiles : iterator
+        Contiguous 1D uint8 arrays whose concatenation is identical to the
+        bytes of `numpy.ascontiguousarray(x)`.
+    """
+
+    if x.flags.c_contiguous:
+        yield x.reshape(-1).view(np.uint8)
+        return
+    if not x.nbytes:
+        return
+
+    # Copy as many consecutive subarrays along the first axis as fit in a
+    # tile, or split them further if a single one doesn't fit:
+    row_nbytes = x.nbytes//len(x)
+    if x.ndim > 1 and row_nbytes > tile_size:
+        for row in x:
+            for tile in _iter_tiles(row, tile_size):
+                yield tile
+    else:
+        n = max(1, tile_size//row_nbytes)
+        for i in xrange(0, len(x), n):
+            yield np.ascontiguousarray(x[i:i+n]).reshape(-1).view(np.uint8)
+
+def _iter_chunks(tiles, chunk_size):
+    """
+    Regroup a sequence of byte arrays into chunks of fixed size.
+
+    Parameters
+    ----------
+    tiles : iterable
+        Contiguous 1D uint8 arrays.
+    chunk_size : int
+        Chunk size in bytes; the last chunk may be smaller.
+
+    Returns
+    -------
+    chunks : iterator
+        Contiguous 1D uint8 arrays; chunks that lie within a single tile are
+        not copied.
+    """
+
+    pending, npending = [], 0
+    for tile in tiles:
+        while len(tile):
+            if not npending and len(tile) >= chunk_size:
+                yield tile[:chunk_size]
+                tile = tile[chunk_size:]
+                continue
+            n = min(chunk_size-npending, len(tile))
+            pending.append(tile[:n])
+            npending += n
+            tile = tile[n:]
+            if npending == chunk_size:
+                yield np.concatenate(pending)
+                pending, npending = [], 0
+    if npending:
+        yield np.concatenate(pending)
+
+# Advise the kernel on the use of memory-mapped pages if possible; the C
+# library's symbols are accessible via the main program:
+_libc = None
+if sys.platform.startswith('linux') or sys.platform == 'darwin':
+    try:
+        _libc = ctypes.CDLL(None, use_errno=True)
+        _libc.madvise.restype = ctypes.c_int
+        _libc.madvise.argtypes = [ctypes.c_void_p, ctypes.c_size_t,
+                                  ctypes.c_int]
+    except (OSError, AttributeError, TypeError):
+        _libc = None
+_MADV_WILLNEED = 3
+_MADV_DONTNEED = 4
+
+def _madvise(start, stop, advice):
+    """
+    Advise the kernel on the use of the pages overlapping an address range.
+    """
+
+    if _libc is None or stop <= start:
+        return
+    start -= start % mmap.PAGESIZE
+    _libc.madvise(start, stop-start, advice)
+
+def _iter_mapped(x, block_size, readahead=True):
+    """
+    Iterate over the bytes of a C-contiguous memory-mapped array.
+
+    Parameters
+    ----------
+    x : numpy.memmap
+        C-contiguous memory-mapped array.
+    block_size : int
+        Block size in bytes; rounded down to a multiple of the page size (but
+        not below it). Blocks are aligned on page boundaries, so the first and
+        last blocks may be shorter.
+    readahead : bool
+        If True, ask the kernel to read each block in advance while the
+        previous one is being hashed.
+
+    Returns
+    -------
+    blocks : iterator
+        Contiguous 1D uint8 arrays.
+
+    Notes
+    -----
+    The pages of each block are released from memory once the block has been
+    processed unless the mapping is copy-on-write, so hashing a large mapped
+    file doesn't keep it resident.
+    """
+
+    page = mmap.PAGESIZE
+    block_size = max(page, block_size-block_size % page)
+    buf = x.reshape(-1).view(np.uint8)
+    base = _address(buf)
+    release = getattr(x, 'mode', None) in ('r', 'r+', 'readonly',
+                                           'readwrite')
+    start = 0
+    while start < len(buf):
+        stop = min(len(buf), block_size-(base+start) % block_size+start)
+        if readahead:
+            _madvise(base+stop, base+min(len(buf), stop+block_size),
+                     _MADV_WILLNEED)
+        yield buf[start:stop]
+        if release:
+            _madvise(base+start, base+stop, _MADV_DONTNEED)
+        start = stop
+
+# Thread pools used for parallel hashing, keyed by number of workers:
+_thread_pools = {}
+
+# Thread pools used by chash_many, keyed by number of workers; they are
+# separate from those above because their workers wait for the chunks of
+# objects hashed in parallel, which would deadlock if the chunks had to be
+# hashed by the waiting workers themselves:
+_many_pools = {}
+
+def _digest_chunks(chunks, workers=None, algo='xxh32'):
+    """
+    Digest a sequence of byte arrays in parallel.
+
+    Parameters
+    ----------
+    chunks : iterable
+        Contiguous 1D uint8 arrays. At most a few chunks per worker are
+        retrieved from the iterable at a time.
+    workers : int
+        Number of threads to use. If None, the number of CPUs is used.
+    algo : str
+        Hash algorithm.
+
+    Returns
+    -------
+    digests : numpy.ndarray
+        Words of the chunk digests in chunk order.
+    """
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers not in _thread_pools:
+        _thread_pools[workers] = multiprocessing.pool.ThreadPool(workers)
+    pool = _thread_pools[workers]
+    digests = []
+    chunks = iter(chunks)
+    while True:
+        batch = list(itertools.islice(chunks, 4*workers))
+        if not batch:
+            break
+        digests.extend(pool.map(lambda chunk: _hash_chunk(chunk, algo), batch))
+    return np.array(digests, dtype='<u4' if algo == 'xxh32' else '<u8')
+
+class _TypeNames(dict):
+    """
+    Cache of the string representations of types.
+    """
+
+    def __missing__(self, t):
+        name = self[t] = str(t)
+        return name
+
+_type_names = _TypeNames()
+
+# Memory-mapped arrays are hashed like the arrays loaded in memory:
+_type_names[np.memmap] = _type_names[np.ndarray]
+
+# Handlers for registered types; each handler is invoked as handler(c, x),
+# where c is the _Context of the current chash() call:
+_registry = {}
+
+# Handlers resolved for concrete types:
+_dispatch_cache = {}
+
+def _register(*classes):
+    """
+    Register the decorated function as the handler of the specified types.
+    """
+
+    def decorator(handler):
+        for t in classes:
+            _registry[t] = handler
+        _dispatch_cache.clear()
+        return handler
+    return decorator
+
+def register_hasher(type, func):
+    """
+    Register a function for hashing instances of a type.
+
+    Parameters
+    ----------
+    type : type
+        Class whose instances (and those of its subclasses) should be hashed
+        with `func`.
+    func : function
+        Function that accepts an instance of `type` and returns a
+        content-hashable representation of it, e.g., a tuple of the
+        instance's data attributes. The returned representation is hashed in
+        place of the instance.
+
+    Notes
+    -----
+    Handlers are resolved using the method resolution order of an object's
+    class, so a hasher registered for a class is also used for its subclasses
+    unless the latter have hashers of their own.
+    """
+
+    def handler(c, x):
+        c.update(func(x))
+    _register(type)(handler)
+
+def _getmro(cls):
+    """
+    Return the base classes of a class in method resolution order.
+
+    Equivalent to `inspect.getmro`, which isn't used to avoid importing
+    `inspect`; old-style classes have no __mro__ attribute, so their bases
+    are searched depth-first.
+    """
+
+    if hasattr(cls, '__mro__'):
+        return cls.__mro__
+    mro = [cls]
+    for base in cls.__bases__:
+        mro.extend(b for b in _getmro(base) if b not in mro)
+    return mro
+
+def _resolve(x):
+    """
+    Find the handler for an object.
+    """
+
+    # Objects of pandas types or subclasses thereof can only exist if pandas
+    # has been imported:
+    if pd is None:
+        _pandas_if_loaded()
+
+    # All old-style class instances have the same type:
+    cls = type(x)
+    if cls is types.InstanceType:
+        cls = x.__class__
+    for base in _getmro(cls):
+        if base in _registry:
+            handler = _registry[base]
+            break
+    else:
+        if np.iterable(x):
+            handler = _hash_iterable
+        elif np.isscalar(x):
+            handler = _hash_scalar
+        elif isinstance(x, types.FunctionType):
+            handler = _hash_function
+        else:
+            handler = _hash_unsupported
+    if type(x) is not types.InstanceType:
+        _dispatch_cache[cls] = handler
+    return handler
+
+class _Context(object):
+    """
+    State of a single chash() invocation.
+    """
+
+    __slots__ = ('h', 'algo', 'vectorize', 'parallel', 'chunk_size',
+                 'workers', 'tile_size', 'memo', 'readahead', 'canonical')
+
+    def __init__(self, algo='xxh32', vectorize=False, parallel=False,
+                 chunk_size=2**22, workers=None, tile_size=2**20, memo=None,
+                 readahead=True, canonical=False):
+        self.h = _algorithms[algo][0]()
+        self.algo = algo
+        self.vectorize = vectorize
+        self.parallel = parallel
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.tile_size = tile_size
+        self.memo = memo
+        self.readahead = readahead
+        self.canonical = canonical
+
+    def update(self, x):
+        try:
+            handler = _dispatch_cache[type(x)]
+        except KeyError:
+            handler = _resolve(x)
+        handler(self, x)
+
+    def spawn(self):
+        """
+        Create a context with a new hasher and the same options.
+        """
+
+        return _Context(self.algo, self.vectorize, self.parallel,
+                        self.chunk_size, self.workers, self.tile_size,
+                        self.memo, self.readahead, self.canonical)
+
+    def options(self):
+        """
+        Return the options that affect computed hashes.
+        """
+
+        return (self.algo, self.vectorize, self.parallel and self.chunk_size,
+                self.canonical)
+
+class HashProfile(object):
+    """
+    Time spent hashing objects of each type.
+
+    Pass an instance to `chash` via its `profile` parameter to record how
+    many objects of each type are hashed and how much time is spent hashing
+    them; the records of successive calls accumulate.
+
+    Attributes
+    ----------
+    calls : dict
+        Number of hashed objects of each type.
+    total_time : dict
+        Time in seconds spent hashing objects of each type, including the time
+        spent hashing the objects they contain.
+    own_time : dict
+        Time in seconds spent hashing objects of each type, excluding the time
+        spent hashing the objects they contain.
+    """
+
+    def __init__(self):
+        self.calls = collections.defaultdict(int)
+        self.total_time = collections.defaultdict(float)
+        self.own_time = collections.defaultdict(float)
+
+    def clear(self):
+        """
+        Discard all records.
+        """
+
+        self.calls.clear()
+        self.total_time.clear()
+        self.own_time.clear()
+
+    def add(self, t, total_time, own_time):
+        self.calls[t] += 1
+        self.total_time[t] += total_time
+        self.own_time[t] += own_time
+
+    def to_frame(self):
+        """
+        Return the records as a DataFrame indexed by type name and sorted by
+        decreasing own time.
+        """
+
+        _import_pandas()
+        types_ = list(self.calls)
+        df = pd.DataFrame({'calls': [self.calls[t] for t in types_],
+                           'total_time': [self.total_time[t] for t in types_],
+                           'own_time': [self.own_time[t] for t in types_]},
+                          index=['%s.%s' % (t.__module__, t.__name__) \
+                                 for t in types_],
+                          columns=['calls', 'total_time', 'own_time'])
+        return df.sort_values('own_time', ascending=False)
+
+class _ProfilingContext(_Context):
+    """
+    Context that records the time spent hashing each object in a profile.
+    """
+
+    __slots__ = ('profile', '_child_time')
+
+    def update(self, x):
+        t = type(x)
+        try:
+            handler = _dispatch_cache[t]
+        except KeyError:
+            handler = _resolve(x)
+
+        # The time spent hashing the objects contained in x is accumulated in
+        # a cell shared with spawned contexts:
+        child_time = self._child_time
+        outer = child_time[0]
+        child_time[0] = 0.0
+        start = timeit.default_timer()
+        try:
+            handler(self, x)
+        finally:
+            elapsed = timeit.default_timer()-start
+            self.profile.add(t, elapsed, elapsed-child_time[0])
+            child_time[0] = outer+elapsed
+
+    def spawn(self):
+        return _new_context(self.profile, self.algo, self.vectorize,
+                            self.parallel, self.chunk_size, self.workers,
+                            self.tile_size, self.memo, self.readahead,
+                            self.canonical, _child_time=self._child_time)
+
+def _new_context(profile, *args, **kwargs):
+    """
+    Create a context; if `profile` isn't None, the time spent hashing is
+    recorded in it.
+    """
+
+    child_time = kwargs.pop('_child_time', None)
+    if profile is None:
+        return _Context(*args, **kwargs)
+    c = _ProfilingContext(*args, **kwargs)
+    c.profile = profile
+    c._child_time = [0.0] if child_time is None else child_time
+    return c
+
+def _is_frozen(x):
+    """
+    Check whether the contents of an array cannot change.
+
+    An array's contents are deemed unchangeable if it and all of the arrays
+    whose memory it views are read-only and the memory is ultimately owned by
+    one of them or by an immutable string.
+    """
+
+    while isinstance(x, np.ndarray):
+        if x.flags.writeable:
+            return False
+        x = x.base
+    return x is None or isinstance(x, str)
+
+class DigestMemo(object):
+    """
+    Memo of content hashes keyed on object identity.
+
+    Remembers the hashes of objects so that they needn't be recomputed when
+    the same objects are hashed again. An entry is discarded as soon as its
+    object is garbage collected. Only objects whose contents are provably
+    unchanged are looked up in the memo, i.e., numpy arrays that are
+    read-only and view read-only memory (see `numpy.ndarray.setflags`); other
+    objects that support weak references, such as pandas objects, are only
+    looked up if `assume_immutable` is True.
+
+    Parameters
+    ----------
+    assume_immutable : bool
+        If True, assume that no memoized object is ever modified.
+
+    Attributes
+    ----------
+    hits : int
+        Number of lookups that found a memoized hash.
+    misses : int
+        Number of lookups that didn't find a memoized hash.
+
+    Notes
+    -----
+    Pass an instance to `chash` via its `memo` parameter to use it. An array
+    that is made writeable, modified and then made read-only again after being
+    memoized will not be detected as modified.
+    """
+
+    def __init__(self, assume_immutable=False):
+        self.assume_immutable = assume_immutable
+        self.hits = 0
+        self.misses = 0
+
+        # Maps object IDs to weak references to the objects and to
+        # dictionaries that map hashing options to hashes:
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """
+        Discard all memoized hashes and reset the counters.
+        """
+
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _memoizable(self, x):
+        if isinstance(x, np.ndarray) and _is_frozen(x):
+            return True
+        return self.assume_immutable
+
+    def get(self, x, options=None):
+        """
+        Return the memoized hash of an object or None.
+        """
+
+        if not self._memoizable(x):
+            return None
+        try:
+            ref, digests = self._entries[id(x)]
+        except KeyError:
+            self.misses += 1
+            return None
+        if ref() is not x or options not in digests:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return digests[options]
+
+    def put(self, x, digest, options=None):
+        """
+        Memoize the hash of an object if its contents cannot change.
+        """
+
+        if not self._memoizable(x):
+            return
+        key = id(x)
+        try:
+            ref, digests = self._entries[key]
+        except KeyError:
+            ref = None
+        if ref is None or ref() is not x:
+            entries = self._entries
+            def discard(r):
+                if key in entries and entries[key][0] is r:
+                    del entries[key]
+            try:
+                ref = weakref.ref(x, discard)
+            except TypeError:
+                return
+            digests = {}
+            self._entries[key] = (ref, digests)
+        digests[options] = digest
+
+def _memoized(handler):
+    """
+    Decorator for handlers whose objects' hashes may be memoized.
+
+    If the context has a memo, the hash of the object is computed separately
+    (or retrieved from the memo) and then used to update the context's hash.
+    """
+
+    def wrapper(c, x):
+        if c.memo is None:
+            handler(c, x)
+            return
+        options = c.options()
+        digest = c.memo.get(x, options)
+        if digest is None:
+            s = c.spawn()
+            s.h.update(_type_names[type(x)])
+            handler(s, x)
+            digest = s.h.digest()
+            c.memo.put(x, digest, options)
+        c.h.update(str(digest))
+    return functools.update_wrapper(wrapper, handler)
+
+def _update_values(c, x):
+    """
+    Update the hash with the bytes of a pandas object's values.
+    """
+
+    values = x.values
+    if not isinstance(values, np.ndarray):
+
+        # Categorical and other extension arrays:
+        c.update(values)
+    elif values.dtype == np.dtype('O'):
+        if not _hash_object_array(c, values):
+            _hash_iterable(c, values)
+    else:
+        for tile in _iter_tiles(values, c.tile_size):
+            c.h.update(_unowned(tile))
+
+# pd.MultiIndex.data doesn't always expose the
+# same bytes for class instances with the same
+# levels/labels/names:
+@_memoized
+def _hash_multiindex(c, x):
+    c.h.update(x.levels)
+    c.h.update(x.labels)
+    c.h.update(x.names)
+
+@_memoized
+def _hash_index(c, x):
+    _update_values(c, x)
+    c.h.update(x.dtype.str)
+
+# The values of a DatetimeIndex are in UTC, so its time zone is also hashed:
+@_memoized
+def _hash_datetime_index(c, x):
+    _update_values(c, x)
+    c.h.update(str(x.tz))
+    c.h.update(x.dtype.str)
+
+@_memoized
+def _hash_period_index(c, x):
+    for tile in _iter_tiles(x.asi8, c.tile_size):
+        c.h.update(_unowned(tile))
+    c.h.update(x.freqstr)
+
+@_memoized
+def _hash_series(c, x):
+    _update_values(c, x)
+    c.h.update(x.dtype.str)
+    c.update(x.index)
+    c.update(x.name)
+
+@_memoized
+def _hash_dataframe(c, x):
+    for b in x._data.blocks:
+        c.update(b.values)
+        c.h.update(str(b.shape))
+        c.h.update(b.dtype.str)
+    c.update(x.columns)
+    c.update(x.index)
+
+def _hash_categorical(c, x):
+    c.update(x.codes)
+    c.update(x.categories)
+    c.h.update(str(x.ordered))
+
+@_register(np.ndarray)
+@_memoized
+def _hash_ndarray(c, x):
+    if x.dtype == np.dtype('O'):
+        if _hash_object_array(c, x):
+            c.h.update(str(x.shape))
+            c.h.update(x.dtype.str)
+        else:
+            _hash_iterable(c, x)
+        return
+    mapped = isinstance(x, np.memmap)
+    if x.flags.c_contiguous and not mapped and \
+       not (c.parallel and x.nbytes > c.chunk_size):
+
+        # Hash arrays in memory (e.g., small arrays used as cache keys)
+        # without iterating over tiles:
+        c.h.update(_unowned(x))
+    else:
+        if mapped and x.flags.c_contiguous:
+            tiles = _iter_mapped(x, c.tile_size, c.readahead)
+        else:
+            tiles = _iter_tiles(x, c.tile_size)
+        if c.parallel and x.nbytes > c.chunk_size:
+
+            # Hash the chunk digests in order so that the result doesn't
+            # depend on the number of workers:
+            digests = _digest_chunks(_iter_chunks(tiles, c.chunk_size),
+                                     c.workers, c.algo)
+            c.h.update(_unowned(digests))
+        else:
+            for tile in tiles:
+                c.h.update(_unowned(tile))
+    c.h.update(str(x.shape))
+    c.h.update(x.dtype.str)
+
+@_register(dict)
+def _hash_dict(c, x):
+    if c.canonical:
+        _hash_unordered(c, x.iteritems(), len(x))
+        return
+    for k, v in x.iteritems():
+        c.update(k)
+        c.update(v)
+
+@_register(basestring)
+def _hash_string(c, x):
+    c.h.update(x)
+
+# Fixed-width little-endian encodings of homogeneous scalar sequences:
+_bulk_dtypes = {bool: np.dtype('<b1'),
+                int: np.dtype('<i8'),
+                long: np.dtype('<i8'),
+                float: np.dtype('<f8'),
+                complex: np.dtype('<c16')}
+
+def _hash_bulk(c, x):
+    """
+    Hash a list or tuple of scalars of identical type in a single pass.
+
+    Returns False if the sequence is not eligible for bulk hashing.
+    """
+
+    t = set(map(type, x))
+    if len(t) != 1:
+        return False
+    t = t.pop()
+    if t in _bulk_dtypes:
+        try:
+            data = np.fromiter(x, dtype=_bulk_dtypes[t], count=len(x))
+        except OverflowError:
+            return False
+        c.h.update(str(t))
+        c.h.update(_unowned(data))
+    elif t is str or t is unicode:
+        _hash_strings(c, x, t)
+    else:
+        return False
+    return True
+
+def _hash_strings(c, x, t):
+    """
+    Hash a sequence of strings of type `t` (str or unicode) in a single pass.
+    """
+
+    # Delimit the elements with NUL characters unless some of them contain
+    # NUL characters, in which case their lengths are also hashed:
+    data = t('\0').join(x)
+    c.h.update(str(t))
+    if data.count('\0') == len(x)-1:
+        c.h.update('\0')
+    else:
+        c.h.update('\1')
+        lengths = np.fromiter(itertools.imap(len, x), dtype='<i8',
+                              count=len(x))
+        c.h.update(_unowned(lengths))
+    if t is unicode:
+        data = data.encode('utf-8')
+
+    # data must outlive the update because _unowned doesn't reference it:
+    c.h.update(_unowned(np.frombuffer(data, np.uint8)))
+
+# Types of the elements of object arrays inferred by pandas that can be
+# hashed with _hash_strings:
+_string_kinds = {'string': str, 'unicode': unicode}
+
+# Type of each element of an object array and whether each element is an
+# instance of a type:
+_element_types = np.frompyfunc(type, 1, 1)
+_is_instance = np.frompyfunc(isinstance, 2, 1)
+
+def _infer_strings(x):
+    """
+    Check whether a 1D object array contains strings without pandas.
+
+    Returns the type of the strings (str or unicode) and the indices of the
+    missing values (None or NaN) if all the other elements are instances of
+    that type (including subclasses such as numpy.str_), as pandas' type
+    inference would, or None and None otherwise.
+    """
+
+    types = _element_types(x)
+    found = set(types)
+    t = set(k for k in _string_kinds.itervalues() for u in found \
+            if issubclass(u, k))
+    if len(t) != 1:
+        return None, None
+    t = t.pop()
+    others = [u for u in found if not issubclass(u, t)]
+    if not others:
+        return t, np.empty(0, np.intp)
+    if not all(u is type(None) or issubclass(u, float) for u in others):
+        return None, None
+    nulls = np.flatnonzero(~_is_instance(x, t).astype(bool))
+    if any(e is not None and e == e for e in x[nulls]):
+        return None, None
+    return t, nulls
+
+def _hash_object_array(c, x):
+    """
+    Hash an array of strings (possibly mixed with missing values) in bulk.
+
+    The strings are hashed in C order in a single pass; the positions and
+    values of missing values such as None or NaN are then hashed separately.
+    Returns False if the array is not eligible for bulk hashing.
+    """
+
+    x = x.ravel()
+    if _pandas_if_loaded() is None:
+        t, nulls = _infer_strings(x)
+        if t is None:
+            return False
+        strings = np.delete(x, nulls) if len(nulls) else x
+    else:
+        kind = pd.api.types.infer_dtype(x)
+        if kind in _string_kinds:
+            nulls = np.empty(0, np.intp)
+            strings = x
+        else:
+            kind = pd.api.types.infer_dtype(x, skipna=True)
+            if kind not in _string_kinds:
+                return False
+            nulls = np.flatnonzero(pd.isnull(x))
+            strings = np.delete(x, nulls)
+        t = _string_kinds[kind]
+    _hash_strings(c, strings, t)
+    c.h.update(str(len(nulls)))
+    if len(nulls):
+        positions = nulls.astype('<i8')
+        c.h.update(_unowned(positions))
+
+        # The missing values are scalars whose hashes (followed by their
+        # types) are concatenated into a single update because xxh would
+        # otherwise keep a string per value alive:
+        values = ''.join(str(e)+_type_names[type(e)] for e in x[nulls])
+        c.h.update(_unowned(np.frombuffer(values, np.uint8)))
+    return True
+
+def _hash_unordered(c, items, n):
+    """
+    Hash a collection of `n` items independently of their order.
+
+    Each item is a sequence of objects (e.g., a key and its value) that are
+    hashed together in a separate context; the item digests are then summed
+    modulo the hash width, which is commutative and hence doesn't depend on
+    the iteration order.
+    """
+
+    hasher, bits = _algorithms[c.algo]
+    s = c.spawn()
+    total = 0
+    for item in items:
+        s.h = hasher()
+        for e in item:
+            s.h.update(_type_names[type(e)])
+            s.update(e)
+        total += s.h.digest()
+    c.h.update(str(n))
+    c.h.update(str(total & ((1 << bits)-1)))
+
+@_register(list, tuple, set, frozenset, bytearray, buffer, xrange)
+def _hash_iterable(c, x):
+    if c.canonical and isinstance(x, (set, frozenset)):
+        _hash_unordered(c, ((e,) for e in x), len(x))
+        return
+    if c.vectorize and type(x) in (list, tuple) and x and _hash_bulk(c, x):
+        return
+    for e in x:
+        c.update(e)
+        c.h.update(_type_names[type(e)])
+
+@_register(bool, int, long, float, complex, type(None), np.generic,
+           datetime.date, datetime.time, datetime.timedelta)
+def _hash_scalar(c, x):
+    c.h.update(str(x))
+
+def _import_pandas():
+    """
+    Import pandas and register the hashers of its types.
+
+    Returns
+    -------
+    pd : module
+        The pandas module.
+    """
+
+    global pd
+    if pd is not None:
+        return pd
+    with _pandas_lock:
+        if pd is None:
+            import pandas
+            _register(pandas.MultiIndex)(_hash_multiindex)
+            _register(pandas.Index)(_hash_index)
+            _register(pandas.DatetimeIndex)(_hash_datetime_index)
+            _register(pandas.PeriodIndex)(_hash_period_index)
+            _register(pandas.Series)(_hash_series)
+            _register(pandas.DataFrame)(_hash_dataframe)
+            _register(pandas.Categorical)(_hash_categorical)
+            _register(pandas.Timestamp, pandas.Timedelta, pandas.Period,
+                      pandas.Interval, type(pandas.NaT))(_hash_scalar)
+            pd = pandas
+    return pd
+
+def _pandas_if_loaded():
+    """
+    Return the pandas module (see `_import_pandas`) if it has already been
+    imported by any module, None otherwise.
+    """
+
+    if pd is not None or 'pandas' in sys.modules:
+        return _import_pandas()
+    return None
+
+@_register(slice)
+def _hash_slice(c, x):
+    c.h.update(str(x.start))
+    c.h.update(str(x.stop))
+    c.h.update(str(x.step))
+
+def _hash_code_attrs(c, x):
+
+    # The file name and line numbers are omitted so that moving a function
+    # doesn't change its digest; nested code objects (e.g., of lambdas) in
+    # the constants are hashed recursively:
+    c.h.update(x.co_argcount)
+    c.h.update(x.co_cellvars)
+    c.h.update(x.co_code)
+    c.update(x.co_consts)
+    c.h.update(x.co_flags)
+    c.h.update(x.co_freevars)
+    c.h.update(x.co_name)
+    c.h.update(x.co_names)
+    c.h.update(x.co_nlocals)
+    c.h.update(x.co_varnames)
+
+# Digests of code objects, which are immutable, keyed on their IDs and
+# mapped to weak references to the objects and to dictionaries that map
+# hashing options to digests; entries are discarded when the code objects
+# are garbage collected:
+_code_digests = {}
+
+# Functions being hashed by each thread, used to detect closures that
+# (directly or indirectly) capture themselves:
+_hashing = threading.local()
+
+@_register(types.CodeType)
+def _hash_code(c, x):
+    options = c.options()
+    key = id(x)
+    try:
+        ref, digests = _code_digests[key]
+        if ref() is not x:
+            raise KeyError(key)
+    except KeyError:
+        def discard(r):
+            if key in _code_digests and _code_digests[key][0] is r:
+                del _code_digests[key]
+        ref, digests = _code_digests[key] = (weakref.ref(x, discard), {})
+    try:
+        digest = digests[options]
+    except KeyError:
+        s = c.spawn()
+        _hash_code_attrs(s, x)
+        digest = digests[options] = s.h.digest()
+    c.h.update(str(digest))
+
+# Types of the values bound to functions and methods that are hashed by type
+# alone because their content is either external (files, loggers) or consumed
+# by reading it (iterators and generators; see _hash_captured):
+_handle_types = (file, io.IOBase, logging.Logger, logging.LoggerAdapter)
+
+def _hash_captured(c, x):
+    """
+    Update the hash with a value bound to a function or method.
+
+    Files, loggers and iterators (e.g., generators or `itertools.count()`)
+    are identified by their type alone and are never read. Other values are
+    hashed by content; a value without a hasher (e.g., the instance captured
+    by a callback such as `lambda x: self.f(x)`) raises a ValueError unless
+    one is registered for its type with `register_hasher`.
+    """
+
+    t = type(x)
+    c.h.update(_type_names[t])
+    if isinstance(x, _handle_types) or \
+       (hasattr(t, 'next') and hasattr(t, '__iter__')):
+        c.h.update('\2')
+        return
+    try:
+        handler = _dispatch_cache[t]
+    except KeyError:
+        handler = _resolve(x)
+    if handler is _hash_unsupported:
+        raise ValueError('value of type \'%s\' bound to a function not '
+                         'content-hashable; use register_hasher to '
+                         'register a hasher for it' % t.__name__)
+    c.update(x)
+
+@_register(types.FunctionType)
+def _hash_function(c, x):
+
+    # Only the values bound to the function are hashed on every call:
+    _hash_code(c, x.func_code)
+    if x.func_defaults is not None:
+        c.h.update('\0')
+        c.h.update(str(len(x.func_defaults)))
+        for value in x.func_defaults:
+            _hash_captured(c, value)
+    if x.func_closure is None:
+        return
+    try:
+        active = _hashing.functions
+    except AttributeError:
+        active = _hashing.functions = set()
+    if id(x) in active:
+        c.h.update('\1')
+        return
+    active.add(id(x))
+    try:
+        for cell in x.func_closure:
+            try:
+                value = cell.cell_contents
+            except ValueError:
+
+                # The variable hasn't been assigned yet:
+                c.h.update('\0')
+            else:
+                _hash_captured(c, value)
+    finally:
+        active.discard(id(x))
+
+@_register(types.MethodType)
+def _hash_method(c, x):
+    c.h.update(_type_names[type(x.im_func)])
+    c.update(x.im_func)
+    if x.im_self is None:
+        _hash_class(c, x.im_class)
+    else:
+        _hash_captured(c, x.im_self)
+
+@_register(functools.partial)
+def _hash_partial(c, x):
+    c.h.update(_type_names[type(x.func)])
+    c.update(x.func)
+    c.h.update(str(len(x.args)))
+    for value in x.args:
+        _hash_captured(c, value)
+    for key, value in sorted((x.keywords or {}).iteritems()):
+        c.h.update(key)
+        _hash_captured(c, value)
+
+@_register(type, types.ClassType)
+def _hash_class(c, x):
+    c.h.update(x.__module__)
+    c.h.update(x.__name__)
+
+def _hash_unsupported(c, x):
+    raise ValueError('type \'%s\' not content-hashable' % type(x).__name__)
+
+def chash(x, algo='xxh32', vectorize=False, parallel=False, chunk_size=2**22,
+          workers=None, tile_size=2**20, memo=None, profile=None,
+          canonical=False):
     """
     Hash based upon content.
 
@@ -26,77 +1178,429 @@ def chash(x):
     ----------
     x : object
        Data to hash.
+    algo : str
+       Hash algorithm; 'xxh32' (32-bit xxHash), 'xxh64' (64-bit xxHash) or
+       'xxh64x2' (128-bit hash obtained by concatenating two 64-bit xxHash
+       hashes with different seeds). Wider hashes make collisions less
+       likely when many objects are hashed, e.g., to key large caches.
+    vectorize : bool
+       If True, lists and tuples whose elements are all bools, ints, longs,
+       floats, complex numbers, strings or Unicode strings of the same type
+       are hashed in bulk as a single typed buffer. This is much faster for
+       long sequences but yields different hashes than the elementwise
+       scheme used by default.
+    parallel : bool
+       If True, numpy arrays (including pandas data blocks) larger than
+       `chunk_size` bytes are split into chunks of that size that are hashed
+       concurrently; the chunk digests are then hashed in order. The result
+       depends on `chunk_size` but not on the number of workers.
+    chunk_size : int
+       Chunk size in bytes used when `parallel` is True.
+    workers : int
+       Number of threads used when `parallel` is True. If None, the number of
+       CPUs is used.
+    tile_size : int
+       Arrays that aren't C-contiguous are copied and hashed in C order one
+       tile of at most this many bytes at a time rather than all at once;
+       C-contiguous memory-mapped arrays are hashed in page-aligned blocks of
+       this size whose pages are released from memory after hashing. This
+       doesn't affect the result.
+    memo : DigestMemo
+       Memo used to look up and store the hashes of numpy arrays and pandas
+       objects contained in `x` (including `x` itself). Using a memo changes
+       the computed hashes.
+    profile : HashProfile
+       Profile in which to record the time spent hashing `x` and each object
+       it contains by type. This doesn't affect the result.
+    canonical : bool
+       If True, dicts, sets and frozensets are hashed independently of the
+       order in which their elements are iterated, so equal collections built
+       in different orders have the same hash. Each element (or key-value
+       pair) is hashed separately and the digests are combined by addition
+       in linear time; no sorting is needed, so the elements may be of
+       mutually incomparable types. This yields different hashes than the
+       default ordered scheme.
 
     Returns
     -------
-    hash : str
+    hash : int
        Computed content hash.
 
     Notes
     -----
-    Certain user-defined class might not be content-hashable using this function.
-    """
-
-    h = xxh.Hasher32()
-    h.update(str(type(x)))
-
-    def update(x):
-        # pd.MultiIndex.data doesn't always expose the
-        # same bytes for class instances with the same 
-        # levels/labels/names:
-        if isinstance(x, pd.MultiIndex):
-            h.update(x.levels)
-            h.update(x.labels)
-            h.update(x.names)
-        elif isinstance(x, pd.Index):
-            h.update(x.data)
-            h.update(x.dtype.str)
-        elif isinstance(x, pd.Series):
-            h.update(x.data)
-            h.update(x.dtype.str)
-            update(x.index)
-            update(x.name)
-        elif isinstance(x, pd.DataFrame):
-            for b in x._data.blocks:
-                update(b.values)
-                h.update(str(b.shape))
-                h.update(b.dtype.str)
-            update(x.columns)
-            update(x.index)
-        elif isinstance(x, np.ndarray) and x.dtype != np.dtype('O'):
-            h.update(np.ascontiguousarray(x).view(np.uint8))
-            h.update(str(x.shape))
-            h.update(x.dtype.str)
-        elif isinstance(x, dict):
-            for k, v in x.iteritems():
-                update(k)
-                update(v)
-        elif isinstance(x, basestring):
-            h.update(x)
-        elif np.iterable(x):
-            for e in x:
-                update(e)
-                h.update(str(type(e)))
-        elif np.isscalar(x) or x is None:
-            h.update(str(x))
-        elif type(x) is slice:
-            h.update(str(x.start))
-            h.update(str(x.stop))
-            h.update(str(x.step))
-        elif inspect.isfunction(x):
-            fc = x.func_code
-            h.update(fc.co_argcount)
-            h.update(fc.co_cellvars)
-            h.update(fc.co_code)
-            h.update(fc.co_consts)
-            h.update(fc.co_flags)
-            h.update(fc.co_freevars)
-            h.update(fc.co_name)
-            h.update(fc.co_names)
-            h.update(fc.co_nlocals)
-            h.update(fc.co_varnames)
+    Certain user-defined class might not be content-hashable using this
+    function unless a hasher is registered for them with `register_hasher`.
+    """
+
+    if algo not in _algorithms:
+        raise ValueError('unsupported hash algorithm \'%s\'' % algo)
+    if profile is None:
+        c = _Context(algo, vectorize, parallel, chunk_size, workers, tile_size,
+                     memo, canonical=canonical)
+    else:
+        c = _new_context(profile, algo, vectorize, parallel, chunk_size,
+                         workers, tile_size, memo, canonical=canonical)
+    c.h.update(_type_names[type(x)])
+    c.update(x)
+    return c.h.digest()
+
+# xxHash 64 primes:
+_P1 = np.uint64(11400714785074694791)
+_P2 = np.uint64(14029467366897019727)
+_P3 = np.uint64(1609587929392839161)
+_P4 = np.uint64(9650029242287828579)
+_P5 = np.uint64(2870177450012600261)
+
+def _rotl(x, r):
+    return (x << np.uint64(r)) | (x >> np.uint64(64-r))
+
+def _round(acc, lane):
+    return _rotl(acc+lane*_P2, 31)*_P1
+
+def _row_digests(a):
+    """
+    Compute the xxHash 64 digests of the rows of a byte matrix.
+
+    Parameters
+    ----------
+    a : numpy.ndarray
+        2D uint8 array.
+
+    Returns
+    -------
+    digests : numpy.ndarray
+        uint64 array whose i-th entry is the xxHash 64 digest (with seed 0) of
+        the bytes in the i-th row of `a`.
+
+    Notes
+    -----
+    All rows are processed simultaneously, so the time taken mostly depends
+    on the row length.
+    """
+
+    n, length = a.shape
+    words = np.ascontiguousarray(a[:, :length//8*8]).view('<u8')
+    words = words.astype(np.uint64, copy=False)
+    with np.errstate(over='ignore'):
+        i = 0
+        if length >= 32:
+            v = [np.full(n, _P1+_P2, np.uint64), np.full(n, _P2, np.uint64),
+                 np.zeros(n, np.uint64), np.full(n, -_P1, np.uint64)]
+            while 8*i+32 <= length:
+                for j in xrange(4):
+                    v[j] = _round(v[j], words[:, i+j])
+                i += 4
+            h = _rotl(v[0], 1)+_rotl(v[1], 7)+_rotl(v[2], 12)+_rotl(v[3], 18)
+            for j in xrange(4):
+                h = (h ^ _round(np.uint64(0), v[j]))*_P1+_P4
         else:
-            raise ValueError('type \'%s\' not content-hashable' % type(x).__name__)
+            h = np.full(n, _P5, np.uint64)
+        h += np.uint64(length)
+        while i < length//8:
+            h ^= _round(np.uint64(0), words[:, i])
+            h = _rotl(h, 27)*_P1+_P4
+            i += 1
+        offset = 8*i
+        if offset+4 <= length:
+            lane = np.ascontiguousarray(a[:, offset:offset+4]).view('<u4')
+            h ^= lane[:, 0].astype(np.uint64)*_P1
+            h = _rotl(h, 23)*_P2+_P3
+            offset += 4
+        while offset < length:
+            h ^= a[:, offset].astype(np.uint64)*_P5
+            h = _rotl(h, 11)*_P1
+            offset += 1
+        h ^= h >> np.uint64(33)
+        h *= _P2
+        h ^= h >> np.uint64(29)
+        h *= _P3
+        h ^= h >> np.uint64(32)
+    return h
+
+def _element_digests(values):
+    """
+    Compute uint64 digests of the elements of a 1D object array.
+
+    Each digest only depends on its element: strings are hashed in bulk with
+    pandas' vectorized hash (combined with a digest of their type) and other
+    elements by `chash`.
+    """
+
+    digests = np.empty(len(values), '<u8')
+    types = _element_types(values)
+    rest = np.ones(len(values), bool)
+    for t in (str, unicode):
+        mask = types == t
+        if mask.any():
+            digests[mask] = pd.util.hash_array(values[mask], categorize=False)
+            digests[mask] ^= np.uint64(xxh.hash64(_type_names[t]))
+            rest &= ~mask
+    for i in np.flatnonzero(rest):
+        digests[i] = chash(values[i], algo='xxh64')
+    return digests
+
+def _column_values(column):
+    """
+    Return the values of a pandas Series as a contiguous array.
+
+    Values of object dtype or of pandas-specific types are replaced by their
+    digests (see `_element_digests`).
+    """
+
+    values = column.values
+    if not isinstance(values, np.ndarray) or values.dtype == np.dtype('O'):
+        values = _element_digests(np.asarray(values, dtype=object))
+    return np.ascontiguousarray(values)
+
+def _frame_row_bytes(df):
+    """
+    Assemble the bytes of the values in each row of a DataFrame.
+
+    Returns a 2D uint8 array whose i-th row contains the bytes of the values in
+    the i-th row of the DataFrame in column order. Values of columns with
+    object dtype are replaced by their content hashes.
+    """
+
+    columns = []
+    for name, column in df.iteritems():
+        values = _column_values(column)
+
+        # The row width is explicit because it can't be inferred from an
+        # empty array:
+        width = values.itemsize*int(np.prod(values.shape[1:], dtype=int))
+        columns.append(values.view(np.uint8).reshape(len(df), width))
+    if not columns:
+        return np.empty((len(df), 0), np.uint8)
+    return np.hstack(columns)
+
+def chash_rows(df):
+    """
+    Hash the rows of a DataFrame.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame to hash.
+
+    Returns
+    -------
+    hashes : pandas.Series
+        uint64 hashes of the rows indexed by the DataFrame's index; see
+        `chash_many`.
+    """
+
+    _import_pandas()
+    return pd.Series(_row_digests(_frame_row_bytes(df)), index=df.index)
+
+def chash_columns(df):
+    """
+    Hash the columns of a DataFrame.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame to hash.
+
+    Returns
+    -------
+    hashes : pandas.Series
+        uint64 hashes of the columns indexed by the DataFrame's columns. Each
+        hash is the xxHash 64 digest of a column's dtype and values, where
+        columns of strings are hashed in bulk and other values of object dtype
+        are represented by their digests (see `chash_many`).
+    """
+
+    _import_pandas()
+    hashes = np.empty(len(df.columns), np.uint64)
+    for i, (name, column) in enumerate(df.iteritems()):
+        c = _Context('xxh64')
+        c.h.update(column.dtype.str)
+
+        # Hash columns of strings in bulk:
+        values = column.values
+        if not (isinstance(values, np.ndarray) and \
+                values.dtype == np.dtype('O') and \
+                _hash_object_array(c, values)):
+
+            # The array must outlive the update because _unowned doesn't
+            # reference it:
+            values = _column_values(column)
+            c.h.update(_unowned(values))
+        hashes[i] = c.h.digest()
+    return pd.Series(hashes, index=df.columns)
+
+FrameDiff = collections.namedtuple('FrameDiff',
+                                   ['changed_rows', 'added_rows',
+                                    'removed_rows', 'changed_columns',
+                                    'added_columns', 'removed_columns'])
+
+def _diff_hashes(old, new):
+    """
+    Compare two Series of hashes by label.
+    """
+
+    if old.index.equals(new.index):
+        return new.index[old.values != new.values], new.index[:0], \
+            old.index[:0]
+    common = new.index.isin(old.index)
+    labels = new.index[common]
+    changed = labels[old.reindex(labels).values != new.values[common]]
+    return changed, new.index[~common], old.index[~old.index.isin(new.index)]
+
+def diff_frames(old, new):
+    """
+    Find the rows and columns that differ between two DataFrames.
+
+    Rows and columns are matched by label, so the index and columns of each
+    DataFrame must be unique.
+
+    Parameters
+    ----------
+    old, new : pandas.DataFrame
+        DataFrames to compare.
+
+    Returns
+    -------
+    diff : FrameDiff
+        Labels of the rows and columns of `new` whose contents differ from
+        those of `old` (`changed_rows`, `changed_columns`), of those that are
+        not in `old` (`added_rows`, `added_columns`) and of those of `old` that
+        are not in `new` (`removed_rows`, `removed_columns`). A row is deemed
+        changed if any of its values differs or if the labels, order or
+        dtypes of the columns differ.
+    """
+
+    for df in (old, new):
+        if not (df.index.is_unique and df.columns.is_unique):
+            raise ValueError('index and columns must be unique')
+
+    # Fold the column labels and dtypes into the row hashes so that all rows
+    # are deemed changed if they differ:
+    hashes = []
+    for df in (old, new):
+        columns = chash([list(df.columns), map(str, df.dtypes)], 'xxh64')
+        hashes.append(chash_rows(df) ^ np.uint64(columns))
+    rows = _diff_hashes(*hashes)
+    columns = _diff_hashes(chash_columns(old), chash_columns(new))
+    return FrameDiff(rows[0], rows[1], rows[2],
+                     columns[0], columns[1], columns[2])
+
+def chash_file(path, buffer_size=2**20, readahead=True, **options):
+    """
+    Hash the contents of a file without loading it into memory.
+
+    Parameters
+    ----------
+    path : str
+        File name. Files in numpy's .npy format are hashed like the arrays
+        they contain; other files are hashed like strings containing their
+        contents.
+    buffer_size : int
+        Number of bytes read at a time.
+    readahead : bool
+        If True, read each block of the file in advance while the previous
+        one is being hashed.
+    options : dict
+        Keyword arguments passed to `chash`.
+
+    Returns
+    -------
+    hash : int
+        Computed content hash; identical to that of the array or string
+        loaded from the file.
+    """
+
+    options['tile_size'] = buffer_size
+    algo = options.pop('algo', 'xxh32')
+    if algo not in _algorithms:
+        raise ValueError('unsupported hash algorithm \'%s\'' % algo)
+    c = _new_context(options.pop('profile', None), algo,
+                     readahead=readahead, **options)
+    with open(path, 'rb') as f:
+        magic = f.read(len(np.lib.format.MAGIC_PREFIX))
+    if magic == np.lib.format.MAGIC_PREFIX:
+        try:
+            x = np.load(path, mmap_mode='r')
+        except ValueError:
+
+            # Arrays of Python objects or empty arrays can't be memory-mapped:
+            x = np.load(path, allow_pickle=True)
+        c.h.update(_type_names[np.ndarray])
+        c.update(x)
+    else:
+        c.h.update(_type_names[str])
+        if os.path.getsize(path):
+            x = np.memmap(path, np.uint8, 'r')
+            for block in _iter_mapped(x, buffer_size, readahead):
+                c.h.update(_unowned(block))
+    return c.h.digest()
+
+def _chash_star(args):
+    x, options = args
+    return chash(x, **options)
+
+def chash_many(x, workers=1, processes=False, **options):
+    """
+    Hash many objects.
+
+    Parameters
+    ----------
+    x : iterable, numpy.ndarray or pandas.DataFrame
+        Objects to hash. If `x` is a 2D numpy array or a DataFrame, its rows
+        are hashed.
+    workers : int
+        Number of workers among which to divide the objects. If None, the
+        number of CPUs is used. Ignored for arrays and DataFrames.
+    processes : bool
+        If True, use a pool of processes rather than threads; the objects and
+        `options` must then be picklable.
+    options : dict
+        Keyword arguments passed to `chash`.
+
+    Returns
+    -------
+    hashes : list or numpy.ndarray
+        Hashes of the objects in iteration order, i.e., `[chash(e, **options)
+        for e in x]`. The rows of an array or DataFrame are instead hashed
+        together in a vectorized fashion; the i-th entry of the returned
+        uint64 array is the xxHash 64 digest of the bytes of the values in the
+        i-th row, where values of object dtype are represented by 64-bit
+        digests: strings are hashed with pandas' vectorized hash (see
+        `pandas.util.hash_array`) and other objects by their own content
+        hashes. These row hashes don't depend on `options`.
+    """
+
+    if isinstance(x, np.ndarray) and x.ndim == 2 and \
+       x.dtype != np.dtype('O'):
+        return _row_digests(np.ascontiguousarray(x).view(np.uint8).reshape(
+            len(x), x.shape[1]*x.dtype.itemsize))
+    elif _pandas_if_loaded() is not None and isinstance(x, pd.DataFrame):
+        return _row_digests(_frame_row_bytes(x))
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers > 1:
+        args = [(e, options) for e in x]
+        if processes:
+            pool = multiprocessing.Pool(workers)
+            try:
+                return pool.map(_chash_star, args)
+            finally:
+                pool.close()
+        if workers not in _many_pools:
+            _many_pools[workers] = multiprocessing.pool.ThreadPool(workers)
+        return _many_pools[workers].map(_chash_star, args)
 
-    update(x)
-    return h.digest()
+    # Reuse a single context to avoid repeating the setup performed by chash:
+    algo = options.pop('algo', 'xxh32')
+    if algo not in _algorithms:
+        raise ValueError('unsupported hash algorithm \'%s\'' % algo)
+    hasher = _algorithms[algo][0]
+    c = _new_context(options.pop('profile', None), algo, **options)
+    hashes = []
+    for e in x:
+        c.h = hasher()
+        c.h.update(_type_names[type(e)])
+        c.update(e)
+        hashes.append(c.h.digest())
+    return hashes
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+
+"""
+Incrementally updatable content hash of arrays.
+"""
+
+# Copyright (c) 2014-2015, Lev Givon
+# All rights reserved.
+# Distributed under the terms of the BSD license:
+# http://www.opensource.org/licenses/bsd-license
+
+import chash
+import itertools
+
+import numpy as np
+
+class MerkleTree(object):
+    """
+    Merkle tree digest of a numpy array.
+
+    The bytes of the array in C order are split into fixed-size chunks whose
+    digests are the leaves of a binary tree; each internal node is the digest
+    of its children's digests. When some of the array's subarrays along the
+    first axis are modified or new ones are appended, only the affected chunks
+    and their ancestors are rehashed.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Array with at least one dimension.
+    chunk_size : int
+        Chunk size in bytes.
+    algo : str
+        Hash algorithm (see `chash.chash`).
+
+    Notes
+    -----
+    The tree doesn't keep a reference to the array; the current version of
+    the array must be passed to `update_range`. Passing a tree to `chash.chash`
+    (e.g., as an argument of a method memoized with the decorators in
+    `chash.ccache`) hashes its root digest without rescanning the array.
+    """
+
+    def __init__(self, x, chunk_size=2**20, algo='xxh64'):
+        x = np.asarray(x)
+        if x.ndim < 1:
+            raise ValueError('array must have at least one dimension')
+        if x.dtype == np.dtype('O'):
+            raise ValueError('arrays of objects not supported')
+        if algo not in chash._algorithms:
+            raise ValueError('unsupported hash algorithm \'%s\'' % algo)
+        self.chunk_size = chunk_size
+        self.algo = algo
+        self.dtype = x.dtype
+        self.shape = (0,)+x.shape[1:]
+
+        # levels[0] contains the chunk digests and levels[-1] the root:
+        self._levels = [[]]
+        self._tail = np.empty(0, np.uint8)
+        self.append(x)
+
+    @property
+    def _row_nbytes(self):
+        return int(np.prod(self.shape[1:], dtype=int))*self.dtype.itemsize
+
+    @property
+    def nbytes(self):
+        return self.shape[0]*self._row_nbytes
+
+    def _hash(self, buf):
+        return tuple(chash._hash_chunk(buf, self.algo))
+
+    def _combine(self, digests):
+        words = np.array(digests, dtype='<u4' if self.algo == 'xxh32' \
+                         else '<u8')
+        return self._hash(words.view(np.uint8).ravel())
+
+    def _update_parents(self, changed):
+        """
+        Recompute the ancestors of the specified nodes.
+
+        Parameters
+        ----------
+        changed : set
+            Indices of the modified chunk digests.
+        """
+
+        level = 0
+        while len(self._levels[level]) > 1:
+            if level+1 == len(self._levels):
+                self._levels.append([])
+            children = self._levels[level]
+            parents = self._levels[level+1]
+            del parents[(len(children)+1)//2:]
+            changed = set(i//2 for i in changed)
+            for i in sorted(changed):
+                node = self._combine(children[2*i:2*i+2])
+                if i < len(parents):
+                    parents[i] = node
+                else:
+                    parents.append(node)
+            level += 1
+        del self._levels[level+1:]
+
+    def _rows_bytes(self, x, lo, hi):
+        """
+        Return the bytes in the range [lo, hi) of an array in C order.
+        """
+
+        rb = self._row_nbytes
+        r0, r1 = lo//rb, -(-hi//rb)
+        buf = np.ascontiguousarray(x[r0:r1]).view(np.uint8).ravel()
+        return buf[lo-r0*rb:hi-r0*rb]
+
+    def update_range(self, x, start, stop):
+        """
+        Rehash modified subarrays.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Current version of the array.
+        start, stop : int
+            The subarrays `x[start:stop]` along the first axis were modified.
+        """
+
+        if x.shape != self.shape or x.dtype != self.dtype:
+            raise ValueError('array shape or dtype changed')
+        start, stop, _ = slice(start, stop).indices(self.shape[0])
+        if start >= stop:
+            return
+        rb, cs, nbytes = self._row_nbytes, self.chunk_size, self.nbytes
+        leaves = self._levels[0]
+        changed = set()
+        for i in xrange(start*rb//cs, -(-stop*rb//cs)):
+            buf = self._rows_bytes(x, i*cs, min((i+1)*cs, nbytes))
+            leaves[i] = self._hash(buf)
+            changed.add(i)
+            if len(buf) < cs:
+                self._tail = buf.copy()
+        self._update_parents(changed)
+
+    def append(self, x):
+        """
+        Hash subarrays appended to the array.
+
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Appended subarrays, i.e., the array now equals the concatenation
+            along the first axis of its previous version and `x`.
+        """
+
+        x = np.asarray(x)
+        if x.shape[1:] != self.shape[1:] or x.dtype != self.dtype:
+            raise ValueError('array shape or dtype mismatch')
+        leaves = self._levels[0]
+
+        # Rehash the last chunk if it is incomplete (or the digest of an empty
+        # array):
+        if leaves and (len(self._tail) or not self.nbytes):
+            leaves.pop()
+        changed = set()
+        tiles = itertools.chain([self._tail],
+                                chash._iter_tiles(x, self.chunk_size))
+        for chunk in chash._iter_chunks(tiles, self.chunk_size):
+            changed.add(len(leaves))
+            leaves.append(self._hash(chunk))
+            if len(chunk) < self.chunk_size:
+                self._tail = chunk.copy()
+            else:
+                self._tail = np.empty(0, np.uint8)
+        if not leaves:
+            changed.add(0)
+            leaves.append(self._hash(self._tail))
+        self.shape = (self.shape[0]+len(x),)+self.shape[1:]
+        self._update_parents(changed)
+
+    def digest(self):
+        """
+        Return the root digest.
+        """
+
+        h = chash._algorithms[self.algo][0]()
+        h.update(str(self._levels[-1][0]))
+        h.update(str(self.shape))
+        h.update(self.dtype.str)
+        return h.digest()
+
+def _hash_merkle_tree(c, x):
+    c.h.update(str(x.digest()))
+
+chash._register(MerkleTree)(_hash_merkle_tree)
@@ -0,0 +1,512 @@
+#!/usr/bin/env python
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import main, TestCase
+
+import cachetools
+import numpy as np
+import pandas as pd
+
+from chash import chash, arc_cache_method, cost_cache_method, \
+    disk_cache_method, lfu_cache_method, lru_cache_method, memoize, \
+    shared_cache_method, tiered_cache_method, ttl_cache_method, ARCCache, \
+    DiskCache, GDSFCache, SharedMemoryCache, TieredCache
+
+_shared_name = 'test-%i' % os.getpid()
+
+class _Shared(object):
+    calls = 0
+    @shared_cache_method(_shared_name, algo='xxh64')
+    def meth(self, n):
+        self.calls += 1
+        return np.arange(n)
+
+def _call_shared(n):
+    f = _Shared()
+    x = f.meth(n)
+    return f.calls, isinstance(x, np.memmap), x.sum()
+
+class test_lfu_cache(TestCase):
+    def test_method(self):
+        class Foo(object):
+            calls = 0
+            @lfu_cache_method(10, 0)
+            def meth(self, x, y):
+                self.calls += 1
+                return x+y
+
+        f = Foo()
+        assert f.meth(1, 2) == 3
+        assert f.meth(4, 5) == 9
+        assert f.meth(1, 7) == 3
+        assert f.calls == 2
+        assert len(f.meth.cache) == 2
+
+    def test_binding(self):
+        class Foo(object):
+            calls = 0
+            @lfu_cache_method(10, None)
+            def meth(self, x, y=1):
+                self.calls += 1
+                return x+y
+
+        f = Foo()
+        assert f.meth(1, y=2) == 3
+        assert f.meth(1, 2) == 3
+        assert f.meth(x=1, y=2) == 3
+        assert f.calls == 1
+        assert f.meth(1) == 2
+        assert f.meth(1, 1) == 2
+        assert f.calls == 2
+        self.assertRaises(TypeError, f.meth)
+
+    def test_canonical(self):
+        class Foo(object):
+            calls = 0
+            @lfu_cache_method(10, 0, canonical=True)
+            def meth(self, x):
+                self.calls += 1
+                return len(x)
+
+        a = {str(i): i for i in xrange(100)}
+        b = {}
+        for k in reversed(sorted(a)):
+            b[k] = a[k]
+        f = Foo()
+        f.meth(a)
+        f.meth(b)
+        assert f.calls == 1
+
+    def test_hash_options(self):
+        options = []
+        def hash_func(x, **kwargs):
+            options.append(kwargs)
+            return chash(x, **kwargs)
+        class Foo(object):
+            @lfu_cache_method(10, 0, hash_func=hash_func, vectorize=True,
+                              parallel=True, canonical=True)
+            def meth(self, x):
+                return len(x)
+
+        assert Foo().meth(range(100)) == 100
+        assert options == [{'vectorize': True, 'parallel': True,
+                            'canonical': True}]
+
+    def test_coalesce(self):
+        class Foo(object):
+            calls = 0
+            @lfu_cache_method(10, 0, coalesce=True)
+            def meth(self, x):
+                self.calls += 1
+                time.sleep(0.1)
+                if x < 0:
+                    raise ValueError(x)
+                return x*2
+
+        f = Foo()
+        results = []
+        errors = []
+        def call(x):
+            try:
+                results.append(f.meth(x))
+            except ValueError:
+                errors.append(x)
+        threads = [threading.Thread(target=call, args=(x,)) \
+                   for x in [1]*10+[-1]*10]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == [2]*10
+        assert errors == [-1]*10
+        assert f.calls == 2
+
+    def test_thread_safe(self):
+        class Foo(object):
+            calls = 0
+            @lfu_cache_method(4, 0, thread_safe=True)
+            def meth(self, x):
+                self.calls += 1
+                return np.arange(x).sum()
+
+        f = Foo()
+        errors = []
+        def call(i):
+            try:
+                for j in xrange(200):
+                    assert f.meth((i+j) % 10) == np.arange((i+j) % 10).sum()
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=call, args=(i,)) \
+                   for i in xrange(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert not errors
+        assert len(f.meth.cache) == 4
+
+    def test_stats(self):
+        class Foo(object):
+            @lfu_cache_method(2, 0, stats=True)
+            def meth(self, x):
+                time.sleep(0.01)
+                return x
+
+        f = Foo()
+        for x in [1, 1, 2, 3, 3]:
+            f.meth(x)
+        stats = f.meth.stats
+        assert stats.hits == 2 and stats.misses == 3
+        assert stats.evictions == 1
+        assert stats.compute_time >= 0.03
+        assert stats.hash_time > 0
+        assert stats.hit_latency.count == 2
+        assert stats.miss_latency.count == 3
+        assert stats.miss_latency.percentile(50) >= 0.01
+        assert stats.hit_latency.mean < stats.miss_latency.mean
+        stats.clear()
+        assert stats.hits == 0 and stats.hit_latency.count == 0
+
+class test_memoize(TestCase):
+    def test_function(self):
+        calls = []
+        @memoize()
+        def f(x, y=1, **kwargs):
+            calls.append(x)
+            return x+y+sum(kwargs.values())
+
+        assert f(1, y=2) == 3
+        assert f(1, 2) == 3
+        assert f(y=2, x=1) == 3
+        assert len(calls) == 1
+        assert f(1) == 2
+        assert f(1, z=1) == 3
+        assert f(1, z=2) == 4
+        assert f(1, z=2) == 4
+        assert len(calls) == 4
+        assert f.__name__ == 'f'
+        self.assertRaises(TypeError, f)
+
+    def test_methods(self):
+        class Foo(object):
+            calls = []
+            @memoize()
+            @staticmethod
+            def static(x):
+                Foo.calls.append(x)
+                return x*2
+
+            @memoize()
+            @classmethod
+            def cls(cls, x):
+                cls.calls.append(x)
+                return x*3
+        class Bar(Foo):
+            pass
+
+        assert Foo.static(1) == Foo().static(1) == 2
+        assert Foo.cls(1) == Foo().cls(1) == 3
+        assert len(Foo.calls) == 2
+        assert Bar.cls(1) == 3
+        assert len(Foo.calls) == 3
+
+    def test_code(self):
+        cache = {}
+        calls = []
+        def f(x):
+            calls.append(x)
+            return x+1
+        def g(x):
+            calls.append(x)
+            return x+2
+
+        assert memoize(cache)(f)(1) == 2
+        assert memoize(cache)(g)(1) == 2
+        assert len(calls) == 1
+        assert memoize(cache, include_code=True)(f)(1) == 2
+        assert memoize(cache, include_code=True)(g)(1) == 3
+        assert memoize(cache, include_code=True)(g)(1) == 3
+        assert len(calls) == 3
+
+class test_policies(TestCase):
+    def test_lru(self):
+        class Foo(object):
+            calls = 0
+            @lru_cache_method(2, 0)
+            def meth(self, x):
+                self.calls += 1
+                return x
+
+        f = Foo()
+        for x in [1, 2, 1, 3, 1, 2]:
+            assert f.meth(x) == x
+        assert f.calls == 4
+        assert sorted(f.meth.cache.values()) == [1, 2]
+
+    def test_ttl(self):
+        class Foo(object):
+            calls = 0
+            @ttl_cache_method(10, 0.05)
+            def meth(self, x):
+                self.calls += 1
+                return x
+
+        f = Foo()
+        f.meth(1)
+        f.meth(1)
+        assert f.calls == 1
+        time.sleep(0.1)
+        f.meth(1)
+        assert f.calls == 2
+
+    def test_max_bytes(self):
+        class Foo(object):
+            @lfu_cache_method(key_idx=0, max_bytes=10000)
+            def meth(self, n):
+                return np.zeros(n)
+
+        f = Foo()
+        for n in [500, 500, 600, 100, 5000]:
+            f.meth(n)
+        assert f.meth.cache.currsize <= 10000
+        assert f.meth.cache.currsize == \
+            sum(v.nbytes for v in f.meth.cache.values())
+        assert len(f.meth.cache) == 3
+
+        # Results larger than the limit aren't cached:
+        f.meth(2000)
+        assert all(len(v) != 2000 for v in f.meth.cache.values())
+
+        df = pd.DataFrame({'a': ['x'*100]*10})
+        f.meth.cache[0] = df
+        assert f.meth.cache.currsize >= 1000
+
+    def test_arc(self):
+        cache = ARCCache(4)
+        cache[1] = 'a'
+        cache[2] = 'b'
+        assert cache[1] == 'a'
+        assert cache[2] == 'b'
+
+        # A scan of entries accessed once doesn't evict frequently accessed
+        # ones:
+        for i in xrange(10, 30):
+            cache[i] = i
+        assert 1 in cache and 2 in cache
+        assert len(cache) == 4
+
+        # Recently evicted keys are remembered:
+        cache[27] = 27
+        assert cache.p > 0
+
+        cache = ARCCache(100, getsizeof=len)
+        cache[1] = 'x'*60
+        cache[2] = 'x'*30
+        cache[3] = 'x'*30
+        assert cache.currsize <= 100
+        self.assertRaises(ValueError, cache.__setitem__, 4, 'x'*101)
+        assert cache.popitem()[0] in (2, 3)
+
+        # Evicted keys of entries of size 0:
+        cache = ARCCache(3, getsizeof=lambda v: v)
+        cache[1] = 1
+        cache[2] = 0
+        cache[2]
+        cache[1]
+        cache[3] = 3
+        cache[1] = 0
+        cache[2] = 1
+        assert cache[2] == 1 and cache.currsize <= 3
+
+        class Foo(object):
+            calls = 0
+            @arc_cache_method(2, 0)
+            def meth(self, x):
+                self.calls += 1
+                return x
+
+        f = Foo()
+        for x in [1, 1, 2, 3, 1]:
+            f.meth(x)
+        assert f.calls == 3
+
+    def test_cost(self):
+        cache = GDSFCache(2)
+        cache.add(1, 'a', 10.0)
+        cache.add(2, 'b', 1.0)
+        cache.add(3, 'c', 1.0)
+        assert 1 in cache and 3 in cache
+        assert cache.inflation == 1.0
+
+        # Evicted entries inflate the priorities of new ones:
+        cache[3]
+        cache[4] = 'd'
+        assert sorted(cache) == [1, 4]
+        assert cache.inflation == 3.0
+
+        class Foo(object):
+            calls = 0
+            @cost_cache_method(2, 0)
+            def meth(self, x):
+                self.calls += 1
+                time.sleep(x)
+                return x
+
+        f = Foo()
+        for x in [0.05, 0, 0.001, 0.05]:
+            f.meth(x)
+        assert f.calls == 3
+
+class test_disk_cache(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_mapping(self):
+        cache = DiskCache(self.path)
+        x = np.random.rand(10, 3)
+        df = pd.DataFrame({'a': [1, 2], 'b': [1.0, 2.0], 'c': ['x', 'y']})
+        cache[1] = x
+        cache[2] = df
+        cache[3] = {'a': [1, 2]}
+        assert len(cache) == 3
+        assert sorted(cache) == [1, 2, 3]
+        assert isinstance(cache[1], np.memmap)
+        assert np.array_equal(cache[1], x)
+        assert cache[2].equals(df)
+        assert cache[3] == {'a': [1, 2]}
+        assert len(DiskCache(self.path)) == 3
+        del cache[3]
+        assert 3 not in cache
+        self.assertRaises(KeyError, cache.__getitem__, 3)
+
+    def test_eviction(self):
+        cache = DiskCache(self.path, max_bytes=20000)
+        for i in xrange(5):
+            cache[i] = np.zeros(1000)
+        assert len(cache) == 2
+        assert 4 in cache
+        assert cache.evictions == 3
+
+    def test_size_tracking(self):
+        cache = DiskCache(self.path, max_bytes=2**20)
+        scans = []
+        scan = cache._scan
+        cache._scan = lambda: scans.append(1) or scan()
+        for i in xrange(100):
+            cache[i] = i
+        assert len(scans) == 1
+        del cache[0]
+        cache[1] = 'x'*100
+        size = cache._size
+        scan()
+        assert cache._size == size
+
+    def test_method(self):
+        path = self.path
+        class Foo(object):
+            calls = 0
+            @disk_cache_method(path)
+            def meth(self, x):
+                self.calls += 1
+                return x*2
+
+        f = Foo()
+        assert np.array_equal(f.meth(np.arange(5)), np.arange(5)*2)
+        assert np.array_equal(f.meth(np.arange(5)), np.arange(5)*2)
+        assert f.calls == 1
+        assert np.array_equal(Foo().meth(np.arange(5)), np.arange(5)*2)
+
+class test_tiered_cache(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_write_through(self):
+        cache = TieredCache(cachetools.LFUCache(2), {})
+        for i in xrange(3):
+            cache[i] = str(i)
+        assert len(cache.l1) == 2 and len(cache.l2) == 3
+        assert len(cache) == 3 and sorted(cache) == [0, 1, 2]
+        missing = [i for i in xrange(3) if i not in cache.l1][0]
+        assert cache[missing] == str(missing)
+        assert missing in cache.l1
+        assert cache.hits == [0, 1] and cache.promotions == 1
+        assert cache[missing] == str(missing)
+        assert cache.hits == [1, 1]
+        self.assertRaises(KeyError, cache.__getitem__, 3)
+        assert cache.misses == 1
+        del cache[missing]
+        assert missing not in cache
+
+    def test_write_back(self):
+        cache = TieredCache(cachetools.LRUCache(2), {}, write_back=True)
+        cache[0] = 'a'
+        cache[1] = 'b'
+        assert not cache.l2
+        cache[2] = 'c'
+        assert cache.l2 == {0: 'a'} and cache.demotions == 1
+        cache.flush()
+        assert cache.l2 == {0: 'a', 1: 'b', 2: 'c'}
+        assert cache.demotions == 3
+
+    def test_method(self):
+        path = self.path
+        class Foo(object):
+            calls = 0
+            @tiered_cache_method(path, 2)
+            def meth(self, x):
+                self.calls += 1
+                return np.arange(x)
+
+        f = Foo()
+        for x in [1, 2, 1, 3, 4, 1]:
+            assert f.meth(x).sum() == np.arange(x).sum()
+        assert f.calls == 4
+        assert len(f.meth.cache.l1) == 2 and len(f.meth.cache.l2) == 4
+
+        # Results stored on disk survive the in-memory tier:
+        class Foo(object):
+            calls = 0
+            @tiered_cache_method(path, 2)
+            def meth(self, x):
+                self.calls += 1
+                return np.arange(x)
+
+        f = Foo()
+        assert f.meth(3).sum() == 3
+        assert f.calls == 0
+        assert f.meth.cache.hits == [0, 1]
+
+class test_shared_cache(TestCase):
+    def tearDown(self):
+        shutil.rmtree(SharedMemoryCache(_shared_name).path)
+
+    def test_processes(self):
+        f = _Shared()
+        assert f.meth(10).sum() == 45
+        assert f.calls == 1
+        pool = multiprocessing.Pool(2)
+        try:
+            results = pool.map(_call_shared, [10, 10, 20])
+        finally:
+            pool.close()
+            pool.join()
+        assert results[:2] == [(0, True, 45), (0, True, 45)]
+        assert results[2][:2] == (1, False)
+        assert f.meth(20).sum() == 190
+        assert f.calls == 1
+        assert len(SharedMemoryCache(_shared_name)) == 2
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,23 @@
 #!/usr/bin/env python
 
-from chash import chash
+from chash import chash, chash_file, chash_many, chash_rows, chash_columns, diff_frames, \
+    register_hasher, DigestMemo, HashProfile, MerkleTree
+import datetime
+import functools
+import itertools
+import logging
+import multiprocessing
+import xxh
 import numpy as np
 import pandas as pd
-from unittest import main, TestCase
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import weakref
+from unittest import main, skipUnless, TestCase
 
 class test_chash(TestCase):
     def test_builtin(self):
@@ -25,6 +39,13 @@ class test_chash(TestCase):
         assert chash(range(5)) == chash(range(5))
         assert chash(xrange(5)) == chash(xrange(5))
 
+        d = datetime.datetime(2000, 1, 1, 12)
+        assert chash(d) == chash(datetime.datetime(2000, 1, 1, 12))
+        assert chash(d) != chash(d.replace(microsecond=1))
+        assert chash(d.date()) != chash(d)
+        assert chash(d.time()) != chash(d.time().replace(hour=13))
+        assert chash(datetime.timedelta(1)) != chash(datetime.timedelta(2))
+
         assert chash(slice(5)) == chash(slice(5))
         assert chash(slice(0, 5)) == chash(slice(0, 5))
         assert chash(slice(0, 5, 2)) == chash(slice(0, 5, 2))
@@ -39,6 +60,172 @@ class test_chash(TestCase):
         assert chash([1, 'x', (3, 4)]) == chash([1, 'x', (3, 4)])
         assert chash(set([1, 'x', (3, 4)])) == chash(set([1, 'x', (3, 4)]))
 
+    def test_algo(self):
+        x = [1, 'x', np.arange(10), pd.Series([1.0, 2.0])]
+        for algo, bits in [('xxh32', 32), ('xxh64', 64), ('xxh64x2', 128)]:
+            h = chash(x, algo=algo)
+            assert h == chash(x, algo=algo)
+            assert h < 2**bits
+            assert chash(x[:2], algo=algo) != h
+            y = np.random.rand(1000)
+            assert chash(y, algo=algo, parallel=True, chunk_size=100,
+                         workers=1) == \
+                chash(y, algo=algo, parallel=True, chunk_size=100, workers=4)
+        assert chash(x) == chash(x, algo='xxh32')
+        self.assertRaises(ValueError, chash, x, algo='md5')
+
+    def test_vectorize(self):
+        for x in [range(10), [1.0, 2.0], (True, False), [1+1j, 2j],
+                  ['x', 'yz'], [u'x', u'yz'], [1, 'x', [3, 4]]]:
+            assert chash(x, vectorize=True) == chash(x, vectorize=True)
+        assert chash([1, 2], vectorize=True) != chash([1, 3], vectorize=True)
+        assert chash([1, 2], vectorize=True) != chash([1L, 2L], vectorize=True)
+        assert chash([1, 2], vectorize=True) != chash([1.0, 2.0], vectorize=True)
+        assert chash(['a', 'b'], vectorize=True) != \
+            chash([u'a', u'b'], vectorize=True)
+        assert chash(['a', 'bc'], vectorize=True) != \
+            chash(['ab', 'c'], vectorize=True)
+        assert chash(['a\0', 'b'], vectorize=True) != \
+            chash(['a', '\0b'], vectorize=True)
+        assert chash([2**70, 1L], vectorize=True) == chash([2**70, 1L])
+
+    def test_many(self):
+        x = [1, 'x', [1, 2], {'a': (1, None)}, np.arange(3)]
+        assert chash_many(x) == [chash(e) for e in x]
+        assert chash_many(x, algo='xxh64') == [chash(e, algo='xxh64') for e in x]
+        assert chash_many(x, workers=2) == chash_many(x)
+        assert chash_many(x, workers=2, processes=True) == chash_many(x)
+
+        for n in [0, 1, 3, 4, 5, 8, 31, 32, 33, 64, 100]:
+            a = np.random.randint(0, 256, (5, n)).astype(np.uint8)
+            assert list(chash_many(a)) == \
+                [xxh.hash64(a[i].tobytes()) for i in xrange(5)]
+        a = np.random.rand(10, 3)
+        assert list(chash_many(a.T.copy().T)) == list(chash_many(a))
+        assert len(chash_many(np.zeros((0, 3)))) == 0
+        assert len(chash_many(np.zeros((2, 0)))) == 2
+        df = pd.DataFrame({'a': [1, 2, 1], 'b': [1.0, 2.0, 1.0],
+                           'c': ['x', 'y', 'x']})
+        h = chash_many(df)
+        assert len(h) == 3 and h[0] == h[2] and h[0] != h[1]
+
+    def test_many_parallel(self):
+
+        # Objects hashed in parallel by as many workers as chash_many uses:
+        x = [np.random.rand(10**5) for i in xrange(16)]
+        expected = [chash(e, parallel=True, chunk_size=2**14) for e in x]
+        result = []
+        cpu_count = multiprocessing.cpu_count
+        multiprocessing.cpu_count = lambda: 4
+        try:
+            t = threading.Thread(target=lambda: result.append(
+                chash_many(x, workers=None, parallel=True, chunk_size=2**14)))
+            t.daemon = True
+            t.start()
+            t.join(30)
+        finally:
+            multiprocessing.cpu_count = cpu_count
+        assert not t.is_alive()
+        assert result[0] == expected
+
+    def test_frame_diff(self):
+        old = pd.DataFrame({'a': [1, 2, 3], 'b': [1.0, 2.0, 3.0],
+                            'c': ['x', 'y', 'z']}, index=[10, 20, 30])
+        rows = chash_rows(old)
+        columns = chash_columns(old)
+        assert list(rows.index) == [10, 20, 30]
+        assert list(columns.index) == ['a', 'b', 'c']
+        assert rows.equals(chash_rows(old.copy()))
+        assert columns.equals(chash_columns(old.copy()))
+
+        new = old.copy()
+        new.loc[20, 'c'] = 'w'
+        new.loc[40] = [4, 4.0, 'v']
+        new = new.drop(10)
+        d = diff_frames(old, new)
+        assert list(d.changed_rows) == [20]
+        assert list(d.added_rows) == [40]
+        assert list(d.removed_rows) == [10]
+        assert list(d.changed_columns) == ['a', 'b', 'c']
+
+        new = old.copy()
+        new['b'] = [1.0, 2.0, 3.5]
+        new['d'] = 0
+        new = new.drop('a', axis=1)
+        d = diff_frames(old, new[['b', 'c', 'd']])
+        assert list(d.changed_columns) == ['b']
+        assert list(d.added_columns) == ['d']
+        assert list(d.removed_columns) == ['a']
+        assert list(d.changed_rows) == [10, 20, 30]
+
+        # Renaming a column or changing its dtype changes every row:
+        d = diff_frames(old, old.rename(columns={'b': 'e'}))
+        assert list(d.changed_rows) == [10, 20, 30]
+        assert list(d.changed_columns) == []
+        d = diff_frames(old, old.astype({'a': np.uint64}))
+        assert list(d.changed_rows) == [10, 20, 30]
+        assert list(d.changed_columns) == ['a']
+        assert len(diff_frames(old, old.copy()).changed_rows) == 0
+
+        # Each row's hash only depends on its own values:
+        a = chash_rows(pd.DataFrame({'s': ['x', None, u'y', 'z']}))
+        b = chash_rows(pd.DataFrame({'s': ['x', None, 1, 'z']}))
+        assert list(a == b) == [True, True, False, True]
+        assert chash_rows(pd.DataFrame({'s': ['a']}))[0] != \
+            chash_rows(pd.DataFrame({'s': [u'a']}))[0]
+        assert chash_columns(pd.DataFrame({'s': ['x', 'y']}))[0] != \
+            chash_columns(pd.DataFrame({'s': ['x', 'z']}))[0]
+
+        # First run of an incremental job:
+        empty = old.iloc[:0]
+        assert len(chash_rows(pd.DataFrame({'a': np.zeros(0)}))) == 0
+        assert len(chash_rows(empty)) == 0
+        d = diff_frames(empty, old)
+        assert list(d.added_rows) == [10, 20, 30]
+        assert list(d.changed_columns) == ['a', 'b', 'c']
+
+    def test_merkle_tree(self):
+        x = np.random.rand(100, 3)
+        for chunk_size in [8, 100, 10**6]:
+            h = MerkleTree(x, chunk_size).digest()
+            t = MerkleTree(x[:0], chunk_size)
+            for start, stop in [(0, 2), (2, 7), (7, 7), (7, 100)]:
+                t.append(x[start:stop])
+            assert t.digest() == h
+            assert MerkleTree(np.asfortranarray(x), chunk_size).digest() == h
+
+            y = x.copy()
+            y[50] = -1
+            t.update_range(y, 50, 51)
+            assert t.digest() == MerkleTree(y, chunk_size).digest()
+            assert t.digest() != h
+            assert chash(t) == chash(MerkleTree(y, chunk_size))
+
+    def test_file(self):
+        path = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(path, 'x.npy')
+            for x in [np.random.rand(1000, 30), np.random.rand(30, 1000).T,
+                      np.arange(5), np.zeros(0), np.array([1, 'a'], object)]:
+                np.save(filename, x)
+                for buffer_size in [1, 4096, 10**6]:
+                    assert chash_file(filename, buffer_size) == chash(x)
+                assert chash_file(filename, algo='xxh64') == \
+                    chash(x, algo='xxh64')
+                m = np.load(filename, mmap_mode='r') if x.size and \
+                    x.dtype != np.dtype('O') else x
+                assert chash([m, 1], tile_size=4096) == chash([m, 1])
+                assert chash(m) == chash(x)
+                assert chash([m, 1]) == chash([x, 1])
+
+            filename = os.path.join(path, 'x.txt')
+            for data in ['', 'xyz', 'x'*100000]:
+                with open(filename, 'wb') as f:
+                    f.write(data)
+                assert chash_file(filename, 4096) == chash(data)
+        finally:
+            shutil.rmtree(path)
+
     def test_numpy(self):
         assert chash(np.bool_(True)) == chash(np.bool_(True))
 
@@ -73,6 +260,99 @@ class test_chash(TestCase):
         assert chash(np.array([1, 2, 3], dtype=np.int32)) != \
             chash(np.array([1, 2, 3], dtype=np.int64))
 
+    def test_noncontiguous(self):
+        x = np.random.rand(20, 30, 10)
+        for y in [x.T, x[::2, :, ::3], np.asfortranarray(x), x[:, 5],
+                  x.transpose(1, 0, 2)[3:, ::-1]]:
+            h = chash(np.ascontiguousarray(y))
+            for tile_size in [1, 7, 100, 10**6]:
+                assert chash(y, tile_size=tile_size) == h
+                assert chash(y, tile_size=tile_size, parallel=True,
+                             chunk_size=100) == \
+                    chash(np.ascontiguousarray(y), parallel=True,
+                          chunk_size=100)
+
+    def test_no_reference(self):
+        x = np.random.rand(10)
+        r = weakref.ref(x)
+        chash(x)
+        del x
+        assert r() is None
+
+    @skipUnless(os.path.exists('/proc/self/statm'), 'requires procfs')
+    def test_no_leak(self):
+        def rss():
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1])*os.sysconf('SC_PAGE_SIZE')
+        def growth(x, **kwargs):
+            chash(x, **kwargs)
+            before = rss()
+            for i in xrange(40):
+                chash(x, **kwargs)
+            return rss()-before
+
+        # Each leaked copy of the hashed data would take about 1 MB:
+        x = np.array(['%07d' % i for i in xrange(2**17)], object)
+        assert growth(x) < 2**23
+        assert growth(np.array(map(unicode, x), object)) < 2**23
+        x[::7] = None
+        x[1::7] = np.nan
+        x[2] = 'a\0b'
+        assert growth(x) < 2**23
+        assert growth(range(2**17), vectorize=True) < 2**23
+        assert growth([1.0]*2**17, vectorize=True) < 2**23
+
+    def test_parallel(self):
+        x = np.random.rand(10000)
+        h = chash(x, parallel=True, chunk_size=1000, workers=1)
+        for workers in [2, 3, 8]:
+            assert chash(x, parallel=True, chunk_size=1000,
+                         workers=workers) == h
+        assert chash(x, parallel=True, chunk_size=2000) != h
+        assert chash(x, parallel=True, chunk_size=10**6) == chash(x)
+        df = pd.DataFrame({'a': np.arange(1000), 'b': np.random.rand(1000)})
+        assert chash(df, parallel=True, chunk_size=100) == \
+            chash(df.copy(), parallel=True, chunk_size=100)
+
+    def test_memo(self):
+        memo = DigestMemo()
+        x = np.random.rand(100)
+        h = chash(x, memo=memo)
+        assert chash(x.copy(), memo=memo) == h
+        assert memo.hits == 0 and len(memo) == 0
+
+        x.setflags(write=False)
+        assert chash(x, memo=memo) == h
+        assert chash(x, memo=memo) == h
+        assert memo.hits == 1 and len(memo) == 1
+        assert chash([x, x[::2]], memo=memo) == chash([x, x[::2]], memo=memo)
+        assert len(memo) == 1
+        del x
+        assert len(memo) == 0
+
+        memo = DigestMemo(assume_immutable=True)
+        df = pd.DataFrame({'a': [1, 2, 3], 'b': [1.0, 2.0, 3.0]})
+        h = chash(df, memo=memo)
+        assert chash(df, memo=memo) == h
+        assert chash(df.copy(), memo=memo) == h
+        assert memo.hits == 1
+
+    def test_profile(self):
+        profile = HashProfile()
+        df = pd.DataFrame({'a': [1, 2, 3], 'b': [1.0, 2.0, 3.0]})
+        x = [df, {'a': (1, 2)}]
+        assert chash(x, profile=profile) == chash(x)
+        assert profile.calls[list] == 1
+        assert profile.calls[int] == 2
+        assert profile.calls[np.ndarray] == 2
+        assert profile.total_time[list] >= profile.total_time[pd.DataFrame]
+        assert profile.own_time[pd.DataFrame] <= \
+            profile.total_time[pd.DataFrame]-profile.total_time[np.ndarray]
+        assert chash(x, memo=DigestMemo(), profile=profile) == \
+            chash(x, memo=DigestMemo())
+        assert profile.calls[list] == 2
+        assert len(profile.to_frame()) == len(profile.calls)
+
     def test_pandas(self):
         assert chash(pd.Index([1, 2, 'a'])) == chash(pd.Index([1, 2, 'a']))
         assert chash(pd.Series([1, 2, 'a'])) == chash(pd.Series([1, 2, 'a']))
@@ -86,6 +366,132 @@ class test_chash(TestCase):
                                         'b': ['x', 'y', 'z']})) == \
             chash(pd.DataFrame(data={'a': [1, 2, 3],
                                         'b': ['x', 'y', 'z']}))
+    def test_canonical(self):
+        keys = [str(i) for i in xrange(100)]+range(50)+[(1, 'x'), None, 1.5]
+        a = {k: [k] for k in keys}
+        b = {}
+        for k in reversed(keys):
+            b[k] = [k]
+        assert a == b and a.keys() != b.keys()
+        assert chash(a, canonical=True) == chash(b, canonical=True)
+        assert chash(set(a), canonical=True) == chash(set(b), canonical=True)
+        assert chash(frozenset(a), canonical=True) == \
+            chash(frozenset(b), canonical=True)
+        assert chash(a, canonical=True) != chash(a)
+        assert chash({1: 2}, canonical=True) != chash({2: 1}, canonical=True)
+        assert chash({1: 2}, canonical=True) != chash({1: 3}, canonical=True)
+        assert chash(set([1, 2]), canonical=True) != \
+            chash(set([1, 3]), canonical=True)
+        assert chash([{'x': a}], algo='xxh64x2', canonical=True) == \
+            chash([{'x': b}], algo='xxh64x2', canonical=True)
+
+    def test_object_strings(self):
+        x = np.array(['a', 'bc', 'd'], dtype=object)
+        assert chash(x) == chash(x.copy())
+        assert chash(x) != chash(np.array(['ab', 'c', 'd'], dtype=object))
+        assert chash(x) != chash(np.array([u'a', u'bc', u'd'], dtype=object))
+        assert chash(x) != chash(x.reshape(3, 1))
+        assert chash(np.array(['a\0', 'b'], dtype=object)) != \
+            chash(np.array(['a', '\0b'], dtype=object))
+        assert chash(np.array(['a', None], dtype=object)) != \
+            chash(np.array(['a', np.nan], dtype=object))
+        assert chash(np.array(['a', None], dtype=object)) != \
+            chash(np.array([None, 'a'], dtype=object))
+
+        # Object values of pandas objects are hashed by content:
+        s = pd.Series([u'\xe9', None, 'x'*100])
+        assert chash(s) == chash(s.copy(deep=True))
+        df = pd.DataFrame({'a': ['x', 'y', None], 'b': [1, 2, 3]})
+        assert chash(df) == chash(df.copy(deep=True))
+        assert chash(df) != chash(df.replace('y', 'z'))
+        idx = pd.period_range('2000', periods=3, freq='D')
+        assert chash(idx) == chash(idx.copy(deep=True))
+
+        # Dates and times in object arrays are hashed by value:
+        d = datetime.date(2000, 1, 1)
+        assert chash(pd.Series([d])) == chash(pd.Series([d]))
+        assert chash(pd.Index([d])) != chash(pd.Index([d.replace(day=2)]))
+        assert chash(pd.Index([datetime.datetime(2000, 1, 1)],
+                              dtype=object)) != chash(pd.Index([d]))
+
+    def test_index_structure(self):
+        assert chash(pd.RangeIndex(0, 10, 3)) == chash(pd.RangeIndex(0, 11, 3))
+        assert chash(pd.RangeIndex(0, 10, 3)) != chash(pd.RangeIndex(0, 10, 2))
+        s = pd.Series([1.0, 2.0, 3.0])
+        assert chash(s) == chash(s.copy())
+
+        # Indexes are hashed by value, so objects that only differ by the
+        # types of their indexes have the same hashes:
+        same_index = lambda a, b, **kwargs: \
+            chash(pd.Series(0, index=a), **kwargs) == \
+            chash(pd.Series(0, index=b), **kwargs)
+        assert chash(s) == chash(pd.Series([1.0, 2.0, 3.0], index=[0, 1, 2]))
+        assert same_index(pd.RangeIndex(0, 10, 3), [0, 3, 6, 9])
+        assert same_index(pd.RangeIndex(5, -5, -2), range(5, -5, -2))
+        assert same_index(pd.RangeIndex(0), pd.Index([], dtype=np.int64))
+        idx = pd.RangeIndex(10**5)
+        assert same_index(idx, idx.values, tile_size=800)
+        assert chash(pd.DataFrame({'a': [1, 2]})) == \
+            chash(pd.DataFrame({'a': [1, 2]}, index=[0, 1]))
+
+        idx = pd.date_range('2000', periods=100, freq='H')
+        assert chash(idx) == chash(idx.copy(deep=True))
+        assert chash(idx) != chash(pd.date_range('2000', periods=101,
+                                                 freq='H'))
+        assert chash(idx) != chash(pd.date_range('2000', periods=100,
+                                                 freq='T'))
+        assert chash(idx) != chash(idx.tz_localize('UTC'))
+        assert chash(pd.date_range('2000', periods=10, freq='B')) != \
+            chash(pd.date_range('2000', periods=10, freq='D'))
+        assert same_index(idx, pd.DatetimeIndex(list(idx)))
+        idx = pd.date_range('2000-03-25', periods=3, freq='D',
+                            tz='Europe/Paris')
+        assert same_index(idx, pd.DatetimeIndex(list(idx)))
+        assert not same_index(idx, idx.tz_convert('UTC'))
+
+        idx = pd.period_range('2000', periods=10, freq='M')
+        assert chash(idx) == chash(idx.copy(deep=True))
+        assert chash(idx) != chash(pd.period_range('2000', periods=10,
+                                                   freq='Q'))
+
+    def test_categorical(self):
+        s = pd.Series(['a', 'b', 'a'], dtype='category')
+        assert chash(s) == chash(s.copy(deep=True))
+        assert chash(s) != chash(s.cat.reorder_categories(['b', 'a']))
+        assert chash(s) != chash(s.cat.as_ordered())
+        df = pd.DataFrame({'a': s, 'b': [1, 2, 3]})
+        assert chash(df) == chash(df.copy(deep=True))
+        idx = pd.CategoricalIndex(['a', 'b'])
+        assert chash(idx) == chash(idx.copy(deep=True))
+
+    def test_lazy_pandas(self):
+
+        # Arrays of objects are hashed as when pandas is loaded:
+        arrays = ['np.array(["a", "bc"], object)',
+                  'np.array([u"a", None, np.nan, u"b"], object)',
+                  'np.array(["a", u"b"], object)',
+                  'np.array(["a", np.float64(1)], object)',
+                  'np.array([1, None], object)',
+                  'np.array([np.str_("a"), "b"], object)',
+                  'np.array([np.str_("a"), np.str_("b")], object)',
+                  'np.array([np.unicode_("a"), None], object)',
+                  'np.array([np.str_("a"), u"b"], object)',
+                  'np.array(["a", np.float64("nan")], object)']
+        script = 'import sys; import chash; ' \
+                 'chash.chash([1, "a", {2: 3.0}]); ' \
+                 'chash.chash(np.arange(3)); ' \
+                 'assert [chash.chash(x) for x in [%s]] == %r; ' \
+                 'assert "pandas" not in sys.modules; ' \
+                 'import pandas; ' \
+                 'assert chash.chash(pandas.Series([1])) == %r' % \
+                 (', '.join(arrays), [chash(eval(x)) for x in arrays],
+                  chash(pd.Series([1])))
+        env = dict(os.environ,
+                   PYTHONPATH=os.path.dirname(os.path.dirname(
+                       os.path.abspath(__file__))))
+        subprocess.check_call([sys.executable, '-c',
+                               'import numpy as np; '+script], env=env)
+
     def test_other(self):
         class Foo(object):
             pass
@@ -95,5 +501,73 @@ class test_chash(TestCase):
         g = lambda x: x**2
         assert chash(f) == chash(g)
 
+        # Functions containing nested functions:
+        f = lambda x: map(lambda y: y+1, x)
+        g = lambda x: map(lambda y: y+2, x)
+        assert chash(f) != chash(g)
+        assert chash(Foo) == chash(Foo) != chash(object)
+
+    def test_closure(self):
+        def make(a, b=1):
+            return lambda x: x*a+b
+        def fact():
+            def f(n):
+                return 1 if n < 2 else n*f(n-1)
+            return f
+
+        assert chash(make(1)) == chash(make(1))
+        assert chash(make(1)) != chash(make(2))
+        assert chash(make(np.arange(3))) != chash(make(np.arange(4)))
+        assert chash(fact()) == chash(fact())
+        f = lambda x, y=1: x+y
+        g = lambda x, y=2: x+y
+        assert chash(f) != chash(g)
+
+        assert chash(functools.partial(f, 1)) == \
+            chash(functools.partial(f, 1))
+        assert chash(functools.partial(f, 1)) != \
+            chash(functools.partial(f, 2))
+        assert chash(functools.partial(f, y=1)) != \
+            chash(functools.partial(f, y=2))
+
+        # Values without a hasher can't be hashed until one is registered:
+        class Model(object):
+            def f(self, x):
+                return x
+            def make_cb(self):
+                return lambda x: self.f(x)
+        m = Model()
+        self.assertRaises(ValueError, chash, m.make_cb())
+        self.assertRaises(ValueError, chash, m.f)
+        register_hasher(Model, lambda x: 0)
+        assert chash(m.make_cb()) == chash(Model().make_cb())
+        assert chash(m.f) == chash(Model().f) != chash(Model.f)
+
+        # Iterators, files and loggers are hashed by type and never read:
+        it = iter([1, 2, 3])
+        next_it = lambda: next(it)
+        assert chash(next_it) == chash(next_it)
+        assert next_it() == 1
+        counter = itertools.count()
+        assert chash(lambda: next(counter))
+        assert chash(lambda x, log=logging.getLogger(): log.info(x))
+        assert chash(lambda x, out=sys.stdout: out.write(x))
+        assert chash(functools.partial(f, iter([1])))
+
+    def test_register_hasher(self):
+        class Foo(object):
+            def __init__(self, a, b):
+                self.a = a
+                self.b = b
+        class Bar(Foo):
+            pass
+
+        self.assertRaises(ValueError, chash, Foo(1, [2, 3]))
+        register_hasher(Foo, lambda x: (x.a, x.b))
+        assert chash(Foo(1, [2, 3])) == chash(Foo(1, [2, 3]))
+        assert chash(Foo(1, [2, 3])) != chash(Foo(1, [2, 4]))
+        assert chash(Bar(1, [2, 3])) == chash(Bar(1, [2, 3]))
+        assert chash([Foo(1, 2), Bar(3, 4)]) == chash([Foo(1, 2), Bar(3, 4)])
+
 if __name__ == '__main__':
     main()